@@ -1,25 +1,55 @@
 import sqlite3
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, Iterable, Iterator, Tuple
 from ledger.settings import DB_PATH, DB_SCHEMA_VERSION, DEFAULT_CATEGORIES
 from ledger.models.transaction import Transaction
 from ledger.models.category import Category
 from ledger.models.account import Account
 
 
+# 预编译语句缓存容量（sqlite3 默认 128）：按分类筛选、多区间汇总等动态 SQL
+# 会生成不同的语句文本，加大容量避免把常用的固定语句挤出缓存
+_STATEMENT_CACHE_SIZE = 512
+
+# patch_transaction 允许直接修改的列（id 与 created_at 保持不变）
+_PATCHABLE_COLUMNS = frozenset({
+    "type", "amount_cents", "date", "category", "account", "note", "category_id", "account_id",
+})
+
+_INSERT_TRANSACTION_SQL = """
+    INSERT INTO transactions (type, amount_cents, date, category, account, note, created_at, category_id, account_id)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+"""
+
+
 class Database:
     """数据库访问层，支持上下文管理器使用方式"""
     
-    def __init__(self, db_path: Optional[str] = None):
+    def __init__(self, db_path: Optional[str] = None, ephemeral: bool = False):
+        """
+        Args:
+            db_path: 数据库文件路径，默认使用 settings.DB_PATH；可传 ":memory:"
+            ephemeral: 临时数据库（如测试库），关闭持久化保证以换取写入速度，
+                       进程崩溃时数据可能丢失，正式数据库不要开启
+        """
         self._db_path = db_path or DB_PATH
+        self._ephemeral = ephemeral
+        self._savepoint_depth = 0
+        self._rollback_count = 0
         self.conn: Optional[sqlite3.Connection] = None
         self._connect()
         self._init_db()
 
     def _connect(self) -> None:
         """建立数据库连接"""
-        self.conn = sqlite3.connect(self._db_path)
+        self.conn = sqlite3.connect(self._db_path, cached_statements=_STATEMENT_CACHE_SIZE)
         self.conn.execute("PRAGMA foreign_keys = ON")
+        if self._ephemeral:
+            # 不等待 fsync，回滚日志和临时表都放在内存中
+            self.conn.execute("PRAGMA synchronous = OFF")
+            self.conn.execute("PRAGMA journal_mode = MEMORY")
+            self.conn.execute("PRAGMA temp_store = MEMORY")
 
     def __enter__(self) -> "Database":
         return self
@@ -27,6 +57,44 @@ class Database:
     def __exit__(self, exc_type, exc_val, exc_tb) -> None:
         self.close()
 
+    def _commit(self) -> None:
+        """提交事务；处于 rollback_scope 内时不提交，由作用域统一回滚"""
+        if self._savepoint_depth == 0:
+            self.conn.commit()
+
+    @contextmanager
+    def rollback_scope(self) -> Iterator["Database"]:
+        """回滚作用域：退出时撤销作用域内的所有写操作（用于测试隔离）
+        
+        基于 SQLite SAVEPOINT 实现，可嵌套。作用域内不要直接调用 conn.commit()，
+        否则保存点会随事务一起提交而无法回滚。
+        """
+        name = f"rollback_scope_{self._savepoint_depth}"
+        self.conn.execute(f"SAVEPOINT {name}")
+        self._savepoint_depth += 1
+        try:
+            yield self
+        finally:
+            self._savepoint_depth -= 1
+            self.conn.execute(f"ROLLBACK TO {name}")
+            self.conn.execute(f"RELEASE {name}")
+            self._rollback_count += 1
+
+    @property
+    def data_version(self) -> Optional[Tuple[int, int, int]]:
+        """数据版本标识，用于判断缓存的查询结果是否失效
+        
+        由本连接的累计写入行数、rollback_scope 回滚次数和 PRAGMA data_version
+        （其他连接提交的变更）组成；数据可能变化时三者至少有一项改变。
+        
+        连接上有 rollback_scope 之外未提交的事务时返回 None：这些写入可能被
+        conn.rollback() 直接撤销，且不会改变上述任何一项，此时查询结果不可缓存。
+        """
+        if self.conn.in_transaction and self._savepoint_depth == 0:
+            return None
+        other_writes = self.conn.execute("PRAGMA data_version").fetchone()[0]
+        return (self.conn.total_changes, self._rollback_count, other_writes)
+
     def _init_db(self) -> None:
         """初始化数据库schema，支持迁移"""
         cursor = self.conn.cursor()
@@ -48,13 +116,15 @@ class Database:
             self._migrate_v2(cursor)
         if current_version < 3:
             self._migrate_v3(cursor)
+        if current_version < 4:
+            self._migrate_v4(cursor)
         
         # 更新schema版本
         if current_version < DB_SCHEMA_VERSION:
             cursor.execute("DELETE FROM schema_version")
             cursor.execute("INSERT INTO schema_version (version) VALUES (?)", (DB_SCHEMA_VERSION,))
         
-        self.conn.commit()
+        self._commit()
 
     def _migrate_v1(self, cursor: sqlite3.Cursor) -> None:
         """V1: 基础transactions表"""
@@ -130,16 +200,18 @@ class Database:
                     VALUES (?, ?, ?)
                 """, (cat_data["name"], cat_data["type"], created_at))
 
+    def _migrate_v4(self, cursor: sqlite3.Cursor) -> None:
+        """V4: 添加 (type, date) 复合索引，加速按类型的日期区间汇总"""
+        # 等值列 type 在前，范围列 date 在后
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_transactions_type_date ON transactions(type, date)")
+
     # ==================== Transaction CRUD ====================
     
     def add_transaction(self, transaction: Transaction) -> int:
         """新增交易"""
         created_at = datetime.now().isoformat()
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO transactions (type, amount_cents, date, category, account, note, created_at, category_id, account_id)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """, (
+        cursor.execute(_INSERT_TRANSACTION_SQL, (
             transaction.type,
             transaction.amount_cents,
             transaction.date,
@@ -150,10 +222,33 @@ class Database:
             transaction.category_id,
             transaction.account_id
         ))
-        self.conn.commit()
+        self._commit()
         transaction.id = cursor.lastrowid
         return transaction.id
 
+    def add_transactions(self, transactions: Iterable[Transaction]) -> int:
+        """批量新增交易（单条预编译语句 + 一次提交），返回插入条数
+        
+        不回填 Transaction.id；需要 id 时请使用 add_transaction
+        """
+        created_at = datetime.now().isoformat()
+        cursor = self.conn.executemany(_INSERT_TRANSACTION_SQL, (
+            (
+                t.type,
+                t.amount_cents,
+                t.date,
+                t.category,
+                t.account,
+                t.note,
+                created_at,
+                t.category_id,
+                t.account_id
+            )
+            for t in transactions
+        ))
+        self._commit()
+        return cursor.rowcount
+
     def update_transaction(self, transaction: Transaction) -> None:
         """更新交易（保持id和created_at不变）"""
         cursor = self.conn.cursor()
@@ -179,13 +274,34 @@ class Database:
             transaction.account_id,
             transaction.id
         ))
-        self.conn.commit()
+        self._commit()
+
+    def patch_transaction(self, transaction_id: int, **fields: Any) -> None:
+        """只更新指定的列，无需先读出整条交易
+        
+        Args:
+            transaction_id: 交易id
+            **fields: 列名 -> 新值，列名须在 _PATCHABLE_COLUMNS 中
+        """
+        if not fields:
+            return
+        unknown = fields.keys() - _PATCHABLE_COLUMNS
+        if unknown:
+            raise ValueError(f"不支持修改的列: {', '.join(sorted(unknown))}")
+        # 列名按固定顺序拼接，同一组列总是生成相同的 SQL 文本，可命中语句缓存
+        columns = sorted(fields)
+        assignments = ", ".join(f"{column} = ?" for column in columns)
+        self.conn.execute(
+            f"UPDATE transactions SET {assignments} WHERE id = ?",
+            [fields[column] for column in columns] + [transaction_id],
+        )
+        self._commit()
 
     def delete_transaction(self, transaction_id: int) -> None:
         """删除交易"""
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM transactions WHERE id = ?", (transaction_id,))
-        self.conn.commit()
+        self._commit()
 
     def get_transaction_by_id(self, transaction_id: int) -> Optional[Transaction]:
         """根据ID获取交易"""
@@ -222,7 +338,7 @@ class Database:
             INSERT INTO categories (name, parent_id, type, created_at)
             VALUES (?, ?, ?, ?)
         """, (category.name, category.parent_id, category.type, created_at))
-        self.conn.commit()
+        self._commit()
         category.id = cursor.lastrowid
         return category.id
 
@@ -233,13 +349,13 @@ class Database:
             UPDATE categories SET name = ?, parent_id = ?, type = ?
             WHERE id = ?
         """, (category.name, category.parent_id, category.type, category.id))
-        self.conn.commit()
+        self._commit()
 
     def delete_category(self, category_id: int) -> None:
         """删除分类"""
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM categories WHERE id = ?", (category_id,))
-        self.conn.commit()
+        self._commit()
 
     def get_all_categories(self) -> List[Category]:
         """获取所有分类"""
@@ -269,7 +385,7 @@ class Database:
             INSERT INTO accounts (name, type, created_at)
             VALUES (?, ?, ?)
         """, (account.name, account.type, created_at))
-        self.conn.commit()
+        self._commit()
         account.id = cursor.lastrowid
         return account.id
 
@@ -280,13 +396,13 @@ class Database:
             UPDATE accounts SET name = ?, type = ?
             WHERE id = ?
         """, (account.name, account.type, account.id))
-        self.conn.commit()
+        self._commit()
 
     def delete_account(self, account_id: int) -> None:
         """删除账户"""
         cursor = self.conn.cursor()
         cursor.execute("DELETE FROM accounts WHERE id = ?", (account_id,))
-        self.conn.commit()
+        self._commit()
 
     def get_all_accounts(self) -> List[Account]:
         """获取所有账户"""
@@ -312,6 +428,43 @@ class Database:
             result[row[0]] = row[1] or 0
         return result
 
+    def get_summary_by_date_ranges(self, ranges: List[Tuple[str, str]]) -> List[Dict[str, int]]:
+        """一次查询获取多个日期范围的收支汇总（条件聚合，单次扫描）
+        
+        Args:
+            ranges: [(start_date, end_date), ...]
+        
+        Returns:
+            与 ranges 一一对应的 [{"income": int, "expense": int}, ...]
+        """
+        if not ranges:
+            return []
+        
+        columns = []
+        params: List[str] = []
+        for start_date, end_date in ranges:
+            for tx_type in ("income", "expense"):
+                columns.append(
+                    "SUM(CASE WHEN type = ? AND date >= ? AND date <= ? THEN amount_cents ELSE 0 END)"
+                )
+                params.extend((tx_type, start_date, end_date))
+        
+        # 外层区间限制扫描范围，使 date 索引可用
+        params.append(min(start for start, _ in ranges))
+        params.append(max(end for _, end in ranges))
+        cursor = self.conn.cursor()
+        cursor.execute(f"""
+            SELECT {", ".join(columns)}
+            FROM transactions
+            WHERE date >= ? AND date <= ?
+        """, params)
+        
+        row = cursor.fetchone()
+        return [
+            {"income": row[i] or 0, "expense": row[i + 1] or 0}
+            for i in range(0, len(row), 2)
+        ]
+
     def get_category_summary(self, start_date: str, end_date: str, tx_type: str) -> List[Dict[str, Any]]:
         """获取分类汇总"""
         cursor = self.conn.cursor()
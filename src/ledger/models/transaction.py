@@ -1,5 +1,6 @@
 from dataclasses import dataclass
-from typing import Optional, Tuple
+from datetime import date as date_type
+from typing import Any, Optional, Tuple
 
 
 @dataclass
@@ -8,7 +9,7 @@ class Transaction:
     id: Optional[int] = None
     type: str = "expense"  # income / expense
     amount_cents: int = 0
-    date: str = ""  # YYYY-MM-DD
+    date: str = ""  # YYYY-MM-DD（date/datetime 对象请用 from_date 构造）
     category: str = ""  # 兼容旧数据的字符串分类
     account: str = ""   # 兼容旧数据的字符串账户
     note: Optional[str] = ""
@@ -16,6 +17,14 @@ class Transaction:
     category_id: Optional[int] = None  # 外键关联categories表
     account_id: Optional[int] = None   # 外键关联accounts表
 
+    @classmethod
+    def from_date(cls, day: date_type, **fields: Any) -> "Transaction":
+        """以 date/datetime 对象创建Transaction对象，日期转为 YYYY-MM-DD 文本
+
+        日期统一存为 ISO 文本：定长且字典序与时间顺序一致，区间查询可直接走 date 索引
+        """
+        return cls(date=day.strftime("%Y-%m-%d"), **fields)
+
     @property
     def amount_display(self) -> float:
         """获取显示用金额（元）"""
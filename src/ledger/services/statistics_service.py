@@ -8,6 +8,12 @@ from ledger.db.database import Database
 # 时间粒度类型
 GranularityType = Literal["day", "week", "month", "year"]
 
+# 期间汇总缓存的最大条目数
+SUMMARY_CACHE_MAXSIZE = 256
+
+# 趋势数据缓存的最大条目数
+TREND_CACHE_MAXSIZE = 64
+
 
 @dataclass
 class PeriodSummary:
@@ -41,6 +47,12 @@ class StatisticsService:
     
     def __init__(self, db: Database):
         self.db = db
+        # 期间汇总缓存：(start, end) -> (income_cents, expense_cents)
+        self._summary_cache: Dict[Tuple[str, str], Tuple[int, int]] = {}
+        # 趋势数据缓存：查询参数 -> (granularity, ((label, income, expense), ...))
+        self._trend_cache: Dict[tuple, Tuple[str, Tuple[Tuple[str, float, float], ...]]] = {}
+        # 缓存对应的数据版本，版本变化时全部缓存整体失效
+        self._cache_version: Optional[Tuple[int, ...]] = None
 
     @staticmethod
     def get_month_range(year: int, month: int) -> Tuple[str, str]:
@@ -144,13 +156,60 @@ class StatisticsService:
         """获取自定义期间收支汇总"""
         return self._get_period_summary(start_date, end_date)
 
+    def get_multi_period_summary(self, ranges: List[Tuple[str, str]]) -> List[PeriodSummary]:
+        """批量获取多个期间汇总，未缓存的期间合并为一次查询
+        
+        Args:
+            ranges: [(start_date, end_date), ...]
+        
+        Returns:
+            与 ranges 一一对应的 PeriodSummary 列表
+        """
+        self._check_cache_version()
+        found = {key: self._summary_cache[key] for key in ranges if key in self._summary_cache}
+        missing = [key for key in dict.fromkeys(ranges) if key not in found]
+        for key, summary in zip(missing, self.db.get_summary_by_date_ranges(missing)):
+            found[key] = (summary["income"], summary["expense"])
+            self._store_summary(key, found[key])
+        
+        return [
+            PeriodSummary(income_cents=income_cents, expense_cents=expense_cents)
+            for income_cents, expense_cents in (found[key] for key in ranges)
+        ]
+
+    def _check_cache_version(self) -> None:
+        """数据版本变化或无法确定（有未提交的事务）时清空期间汇总与趋势数据缓存"""
+        version = self.db.data_version
+        if version is None or version != self._cache_version:
+            self._summary_cache.clear()
+            self._trend_cache.clear()
+            self._cache_version = version
+
+    @staticmethod
+    def _store_bounded(cache: Dict, key: Any, value: Any, maxsize: int) -> None:
+        """写入缓存，超出容量时淘汰最早写入的条目"""
+        if key not in cache and len(cache) >= maxsize:
+            del cache[next(iter(cache))]
+        cache[key] = value
+
+    def _store_summary(self, key: Tuple[str, str], value: Tuple[int, int]) -> None:
+        """写入期间汇总缓存"""
+        self._store_bounded(self._summary_cache, key, value, SUMMARY_CACHE_MAXSIZE)
+
     def _get_period_summary(self, start_date: str, end_date: str) -> PeriodSummary:
-        """获取期间汇总（内部方法）"""
-        summary = self.db.get_summary_by_date_range(start_date, end_date)
-        return PeriodSummary(
-            income_cents=summary.get("income", 0),
-            expense_cents=summary.get("expense", 0)
-        )
+        """获取期间汇总（内部方法，结果按数据版本缓存）"""
+        self._check_cache_version()
+        
+        key = (start_date, end_date)
+        cached = self._summary_cache.get(key)
+        if cached is None:
+            summary = self.db.get_summary_by_date_range(start_date, end_date)
+            cached = (summary.get("income", 0), summary.get("expense", 0))
+            self._store_summary(key, cached)
+        
+        # 每次返回新的 PeriodSummary，调用方修改不会污染缓存
+        income_cents, expense_cents = cached
+        return PeriodSummary(income_cents=income_cents, expense_cents=expense_cents)
 
     def get_category_breakdown(self, start_date: str, end_date: str, tx_type: str = "expense") -> List[Dict[str, Any]]:
         """获取分类明细"""
@@ -195,13 +254,63 @@ class StatisticsService:
         
         注意: 此方法委托给 get_trend_data_advanced，保留用于向后兼容。
         """
+        granularity = self._auto_granularity(start_date, end_date)
+        return self.get_trend_data_advanced(start_date, end_date, granularity, category=None)
+
+    def get_multi_trend_data(self, ranges: List[Tuple[str, str]]) -> List[Dict[str, Any]]:
+        """批量获取多个区间的趋势图数据，粒度规则与 get_trend_data 相同
+        
+        未缓存的区间共用一次每日汇总查询（覆盖所有区间的最小起点到最大终点），
+        再在内存中按各自区间和粒度聚合。
+        
+        Args:
+            ranges: [(start_date, end_date), ...]
+        
+        Returns:
+            与 ranges 一一对应的趋势数据列表，格式同 get_trend_data
+        """
+        self._check_cache_version()
+        keys = [
+            (start_date, end_date, self._auto_granularity(start_date, end_date), None, None, None)
+            for start_date, end_date in ranges
+        ]
+        found = {key: self._trend_cache[key] for key in keys if key in self._trend_cache}
+        missing = [key for key in dict.fromkeys(keys) if key not in found]
+        if missing:
+            raw_data = self.db.get_daily_summary(
+                min(key[0] for key in missing), max(key[1] for key in missing)
+            )
+            for key in missing:
+                start_date, end_date, granularity = key[:3]
+                in_range = [item for item in raw_data if start_date <= item["date"] <= end_date]
+                found[key] = self._store_trend(key, self._compute_trend_advanced(
+                    start_date, end_date, granularity, None, None, None, raw_data=in_range
+                ))
+        
+        return [self._trend_result(found[key]) for key in keys]
+
+    def get_trend_arrays(
+        self, start_date: str, end_date: str
+    ) -> Tuple[Tuple[str, ...], Tuple[float, ...], Tuple[float, ...]]:
+        """
+        按列获取趋势数据，粒度规则与 get_trend_data 相同
+        
+        Returns:
+            (labels, income, expense) 三个等长元组，便于整列求和或比较
+        """
+        granularity = self._auto_granularity(start_date, end_date)
+        _, points = self._get_trend_points(start_date, end_date, granularity, None, None, None)
+        if not points:
+            return (), (), ()
+        labels, income, expense = zip(*points)
+        return labels, income, expense
+
+    @staticmethod
+    def _auto_granularity(start_date: str, end_date: str) -> GranularityType:
+        """自动选择粒度：≤31天按日，否则按月"""
         start = datetime.strptime(start_date, "%Y-%m-%d").date()
         end = datetime.strptime(end_date, "%Y-%m-%d").date()
-        days_diff = (end - start).days + 1
-        
-        # 自动选择粒度：≤31天按日，否则按月
-        granularity: GranularityType = "day" if days_diff <= 31 else "month"
-        return self.get_trend_data_advanced(start_date, end_date, granularity, category=None)
+        return "day" if (end - start).days + 1 <= 31 else "month"
 
     def get_trend_data_advanced(
         self,
@@ -229,44 +338,120 @@ class StatisticsService:
                 "data": [{"label": str, "income": float, "expense": float}, ...]
             }
         """
+        # 缓存中保存不可变的元组，每次返回新的字典，调用方修改不会污染缓存
+        return self._trend_result(self._get_trend_points(
+            start_date, end_date, granularity, category, income_categories, expense_categories
+        ))
+
+    def _get_trend_points(
+        self,
+        start_date: str,
+        end_date: str,
+        granularity: GranularityType,
+        category: Optional[str],
+        income_categories: Optional[List[str]],
+        expense_categories: Optional[List[str]]
+    ) -> Tuple[str, Tuple[Tuple[str, float, float], ...]]:
+        """按数据版本缓存的趋势数据点：(粒度, ((label, income, expense), ...))"""
+        self._check_cache_version()
+        key = (
+            start_date, end_date, granularity, category,
+            None if income_categories is None else tuple(income_categories),
+            None if expense_categories is None else tuple(expense_categories),
+        )
+        cached = self._trend_cache.get(key)
+        if cached is None:
+            cached = self._store_trend(key, self._compute_trend_advanced(
+                start_date, end_date, granularity, category, income_categories, expense_categories
+            ))
+        return cached
+
+    def _store_trend(self, key: Tuple, result: Dict[str, Any]) -> Tuple[str, Tuple[Tuple[str, float, float], ...]]:
+        """把趋势结果转为不可变元组写入缓存，并返回该元组"""
+        cached = (
+            result["granularity"],
+            tuple((item["label"], item["income"], item["expense"]) for item in result["data"]),
+        )
+        self._store_bounded(self._trend_cache, key, cached, TREND_CACHE_MAXSIZE)
+        return cached
+
+    @staticmethod
+    def _trend_result(cached: Tuple[str, Tuple[Tuple[str, float, float], ...]]) -> Dict[str, Any]:
+        """由缓存的元组构造新的趋势结果字典"""
+        result_granularity, points = cached
+        return {
+            "granularity": result_granularity,
+            "data": [
+                {"label": label, "income": income, "expense": expense}
+                for label, income, expense in points
+            ],
+        }
+
+    def _compute_trend_advanced(
+        self,
+        start_date: str,
+        end_date: str,
+        granularity: GranularityType,
+        category: Optional[str],
+        income_categories: Optional[List[str]],
+        expense_categories: Optional[List[str]],
+        raw_data: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """按粒度分派趋势数据查询（不经过缓存）
+        
+        raw_data 为已查询好的每日汇总时不再访问数据库。
+        """
         start = datetime.strptime(start_date, "%Y-%m-%d").date()
         end = datetime.strptime(end_date, "%Y-%m-%d").date()
+        args = (start, end, category, income_categories, expense_categories, raw_data)
         
         if granularity == "day":
-            return self._get_daily_trend_advanced(start, end, category, income_categories, expense_categories)
+            return self._get_daily_trend_advanced(*args)
         elif granularity == "week":
-            return self._get_weekly_trend_advanced(start, end, category, income_categories, expense_categories)
+            return self._get_weekly_trend_advanced(*args)
         elif granularity == "month":
-            return self._get_monthly_trend_advanced(start, end, category, income_categories, expense_categories)
+            return self._get_monthly_trend_advanced(*args)
         elif granularity == "year":
-            return self._get_yearly_trend_advanced(start, end, category, income_categories, expense_categories)
+            return self._get_yearly_trend_advanced(*args)
         else:
             # 默认按天
-            return self._get_daily_trend_advanced(start, end, category, income_categories, expense_categories)
+            return self._get_daily_trend_advanced(*args)
 
-    def _get_daily_trend_advanced(
+    def _fetch_daily_summary(
         self,
         start: date,
         end: date,
-        category: Optional[str] = None,
-        income_categories: Optional[List[str]] = None,
-        expense_categories: Optional[List[str]] = None
-    ) -> Dict[str, Any]:
-        """按天聚合，支持分类筛选"""
+        category: Optional[str],
+        income_categories: Optional[List[str]],
+        expense_categories: Optional[List[str]]
+    ) -> List[Dict[str, Any]]:
+        """查询每日汇总，作为各粒度聚合的输入"""
         # 优先使用新的多分类参数，如果未指定则使用旧的单分类参数
         if income_categories is not None or expense_categories is not None:
-            raw_data = self.db.get_daily_summary_by_categories(
+            return self.db.get_daily_summary_by_categories(
                 start.strftime("%Y-%m-%d"),
                 end.strftime("%Y-%m-%d"),
                 income_categories,
                 expense_categories
             )
-        else:
-            raw_data = self.db.get_daily_summary_by_category(
-                start.strftime("%Y-%m-%d"),
-                end.strftime("%Y-%m-%d"),
-                category
-            )
+        return self.db.get_daily_summary_by_category(
+            start.strftime("%Y-%m-%d"),
+            end.strftime("%Y-%m-%d"),
+            category
+        )
+
+    def _get_daily_trend_advanced(
+        self,
+        start: date,
+        end: date,
+        category: Optional[str] = None,
+        income_categories: Optional[List[str]] = None,
+        expense_categories: Optional[List[str]] = None,
+        raw_data: Optional[List[Dict[str, Any]]] = None
+    ) -> Dict[str, Any]:
+        """按天聚合，支持分类筛选"""
+        if raw_data is None:
+            raw_data = self._fetch_daily_summary(start, end, category, income_categories, expense_categories)
         
         data_map = {item["date"]: item for item in raw_data}
         
@@ -297,23 +482,12 @@ class StatisticsService:
         end: date,
         category: Optional[str] = None,
         income_categories: Optional[List[str]] = None,
-        expense_categories: Optional[List[str]] = None
+        expense_categories: Optional[List[str]] = None,
+        raw_data: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """按周（ISO周）聚合，支持分类筛选"""
-        # 优先使用新的多分类参数，如果未指定则使用旧的单分类参数
-        if income_categories is not None or expense_categories is not None:
-            raw_data = self.db.get_daily_summary_by_categories(
-                start.strftime("%Y-%m-%d"),
-                end.strftime("%Y-%m-%d"),
-                income_categories,
-                expense_categories
-            )
-        else:
-            raw_data = self.db.get_daily_summary_by_category(
-                start.strftime("%Y-%m-%d"),
-                end.strftime("%Y-%m-%d"),
-                category
-            )
+        if raw_data is None:
+            raw_data = self._fetch_daily_summary(start, end, category, income_categories, expense_categories)
         
         # 按ISO周聚合
         weekly_map: Dict[str, Dict[str, int]] = {}
@@ -359,23 +533,12 @@ class StatisticsService:
         end: date,
         category: Optional[str] = None,
         income_categories: Optional[List[str]] = None,
-        expense_categories: Optional[List[str]] = None
+        expense_categories: Optional[List[str]] = None,
+        raw_data: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """按月聚合，支持分类筛选"""
-        # 优先使用新的多分类参数，如果未指定则使用旧的单分类参数
-        if income_categories is not None or expense_categories is not None:
-            raw_data = self.db.get_daily_summary_by_categories(
-                start.strftime("%Y-%m-%d"),
-                end.strftime("%Y-%m-%d"),
-                income_categories,
-                expense_categories
-            )
-        else:
-            raw_data = self.db.get_daily_summary_by_category(
-                start.strftime("%Y-%m-%d"),
-                end.strftime("%Y-%m-%d"),
-                category
-            )
+        if raw_data is None:
+            raw_data = self._fetch_daily_summary(start, end, category, income_categories, expense_categories)
         
         # 按月聚合
         monthly_map: Dict[str, Dict[str, int]] = {}
@@ -420,23 +583,12 @@ class StatisticsService:
         end: date,
         category: Optional[str] = None,
         income_categories: Optional[List[str]] = None,
-        expense_categories: Optional[List[str]] = None
+        expense_categories: Optional[List[str]] = None,
+        raw_data: Optional[List[Dict[str, Any]]] = None
     ) -> Dict[str, Any]:
         """按年聚合，支持分类筛选"""
-        # 优先使用新的多分类参数，如果未指定则使用旧的单分类参数
-        if income_categories is not None or expense_categories is not None:
-            raw_data = self.db.get_daily_summary_by_categories(
-                start.strftime("%Y-%m-%d"),
-                end.strftime("%Y-%m-%d"),
-                income_categories,
-                expense_categories
-            )
-        else:
-            raw_data = self.db.get_daily_summary_by_category(
-                start.strftime("%Y-%m-%d"),
-                end.strftime("%Y-%m-%d"),
-                category
-            )
+        if raw_data is None:
+            raw_data = self._fetch_daily_summary(start, end, category, income_categories, expense_categories)
         
         # 按年聚合
         yearly_map: Dict[str, Dict[str, int]] = {}
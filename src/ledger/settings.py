@@ -16,7 +16,7 @@ APP_NAME: Final = "Ledger App"
 VERSION: Final = "1.2.1"
 
 # ==================== 数据库配置 ====================
-DB_SCHEMA_VERSION: Final = 3  # V3: 添加默认分类种子数据
+DB_SCHEMA_VERSION: Final = 4  # V4: 添加 transactions(type, date) 复合索引
 
 # ==================== 货币设置 ====================
 CURRENCY_SYMBOL: Final = "$"
@@ -29,6 +29,7 @@ MAX_AMOUNT_CENTS: Final = int(MAX_AMOUNT * 100)  # 转换为分
 # ==================== UI 显示默认值 ====================
 DEFAULT_CATEGORY: Final = "未分类"
 DEFAULT_ACCOUNT: Final = "未指定账户"
+AMOUNT_PLACEHOLDER: Final = f"请输入金额 ({CURRENCY_SYMBOL})"  # 金额输入框提示文字
 
 # ==================== 类型映射 ====================
 CATEGORY_TYPES: Final[Dict[str, str]] = {
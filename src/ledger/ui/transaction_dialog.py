@@ -12,7 +12,7 @@ from PySide6.QtCore import QDate
 from ledger.models.transaction import Transaction
 from ledger.models.category import Category
 from ledger.models.account import Account
-from ledger.settings import MAX_AMOUNT_CENTS, format_money_from_float, CURRENCY_SYMBOL
+from ledger.settings import MAX_AMOUNT_CENTS, format_money_from_float, CURRENCY_SYMBOL, AMOUNT_PLACEHOLDER
 
 logger: Final = logging.getLogger(__name__)
 
@@ -61,7 +61,7 @@ class TransactionDialog(QDialog):
         
         # 金额
         self.amount_input = QLineEdit()
-        self.amount_input.setPlaceholderText(f"请输入金额 ({CURRENCY_SYMBOL})")
+        self.amount_input.setPlaceholderText(AMOUNT_PLACEHOLDER)
         form_layout.addRow(f"金额 ({CURRENCY_SYMBOL}):", self.amount_input)
         
         # 日期
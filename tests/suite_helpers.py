@@ -0,0 +1,56 @@
+"""
+测试脚本共用的辅助函数
+
+- 分组并行运行：各测试套件把分组切成连续批次，每个批次使用独立的套件实例
+- 报告写入：已编码的报告直接写入文件描述符
+- 临时数据库目录：SHM_DIR
+"""
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Iterable, Iterator, Optional, Protocol, Sequence, TextIO, Tuple, TypeVar, Union
+
+# 数据库 shm 临时目录（Linux 下为内存文件系统），不存在时使用系统默认临时目录
+SHM_DIR: Optional[str] = "/dev/shm" if os.path.isdir("/dev/shm") else None
+
+
+class SectionRunner(Protocol):
+    """可按分组运行测试的套件（run_sections 接受 SECTIONS 中的条目）"""
+    
+    def run_sections(self, sections: Iterable[tuple]) -> Any: ...
+
+
+SuiteT = TypeVar("SuiteT", bound=SectionRunner)
+
+
+def run_sections_parallel(sections: Sequence[tuple],
+                          make_suite: Callable[[TextIO], SuiteT]) -> Iterator[Tuple[SuiteT, str]]:
+    """按工作线程数把分组切成连续的批次并行运行，按分组顺序逐批返回 (套件, 输出)
+    
+    每个批次由 make_suite(out) 创建独立的套件实例（各自一个内存数据库），
+    输出写入该批次的缓冲区。线程之间不共享连接、不争用写锁，
+    批次内各测试由套件自身的回滚作用域隔离。
+    """
+    workers = max(1, min(len(sections), os.cpu_count() or 1))
+    batch_size = -(-len(sections) // workers) or 1
+    batches = [sections[i:i + batch_size] for i in range(0, len(sections), batch_size)]
+    
+    def run_batch(batch: Sequence[tuple]) -> Tuple[SuiteT, str]:
+        out = io.StringIO()
+        suite = make_suite(out)
+        suite.run_sections(batch)
+        return suite, out.getvalue()
+    
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        yield from executor.map(run_batch, batches)
+
+
+def write_bytes(path: Union[str, "os.PathLike[str]"], data: bytes) -> None:
+    """以原始文件描述符写入整段数据（通常一次 write 系统调用即可完成）"""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
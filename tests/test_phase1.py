@@ -13,6 +13,7 @@ Phase 1 Integration Tests for Ledger App
 import sys
 import os
 import sqlite3
+import tempfile
 import time
 from datetime import date, timedelta
 from calendar import monthrange
@@ -29,7 +30,8 @@ from ledger.models.transaction import Transaction
 from ledger.models.category import Category
 from ledger.models.account import Account
 from ledger.services.statistics_service import StatisticsService
-from ledger.settings import DB_PATH
+
+from suite_helpers import SHM_DIR
 
 
 class TestRunner:
@@ -1059,12 +1061,18 @@ def main():
     print("Ledger App Phase 1 自动化测试")
     print("="*60)
     
-    # 使用独立的测试数据库
-    test_db_path = str(DB_PATH).replace("app.db", "test_phase1.db")
-    
-    # 创建数据库连接
-    db = Database(test_db_path)
-    
+    # 使用临时目录中的独立测试数据库（Linux 下优先放在内存文件系统 /dev/shm），
+    # 目录在退出时自动删除
+    with tempfile.TemporaryDirectory(dir=SHM_DIR) as tmp_dir:
+        db = Database(os.path.join(tmp_dir, "test_phase1.db"))
+        try:
+            run_all_tests(db)
+        finally:
+            db.close()
+
+
+def run_all_tests(db: Database):
+    """运行所有测试模块并生成报告"""
     # 创建综合测试运行器
     runner = TestRunner()
     
@@ -1107,14 +1115,6 @@ def main():
     
     # 生成报告
     generate_report(runner)
-    
-    # 清理
-    db.close()
-    
-    # 删除测试数据库
-    import os
-    if os.path.exists(test_db_path):
-        os.remove(test_db_path)
 
 
 if __name__ == "__main__":
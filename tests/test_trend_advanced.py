@@ -4,17 +4,21 @@ Phase 1.x - Advanced Trend Chart Test Suite
 日期：2026-01-12
 """
 
+import atexit
+import io
 import sys
 import os
-import tempfile
+import pathlib
 import shutil
+import sqlite3
+import tempfile
+from collections import namedtuple
 from datetime import date, datetime, timedelta
-from typing import Dict, Any, List
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, TextIO, Tuple
 
 # Add the 'src' directory to sys.path
-script_dir = os.path.dirname(os.path.abspath(__file__))
-project_root = os.path.dirname(script_dir)
-sys.path.insert(0, os.path.join(project_root, 'src'))
+_HERE = pathlib.Path(__file__).resolve().parent
+sys.path.insert(0, str(_HERE.parent / 'src'))
 
 from ledger.db.database import Database
 from ledger.models.transaction import Transaction
@@ -22,23 +26,174 @@ from ledger.models.category import Category
 from ledger.models.account import Account
 from ledger.services.statistics_service import StatisticsService
 
+from suite_helpers import SHM_DIR, run_sections_parallel, write_bytes
+
+
+# 标签不存在时使用的空数据点（只读）
+_NO_POINT: Dict[str, Any] = {}
+
+# 各测试用例的数据：用例 -> ((类型, 金额(分), 日期, 分类), ...)
+# 用例之间的日期区间相互重叠且断言的是区间内的绝对金额，因此每个用例单独装载自己的数据
+FIXTURES: Dict[str, tuple] = {
+    "TC-GRAIN-001": (
+        ("expense", 1000, "2026-01-05", "吃饭"),    # $10
+        ("expense", 2000, "2026-01-05", "吃饭"),    # $20 -> 同日合计$30
+        ("expense", 3000, "2026-01-10", "吃饭"),    # $30
+        ("income", 5000, "2026-01-08", "工资"),     # $50
+    ),
+    # 2026-01-05 是周一，2026-01-11 是周日 -> 同一周 W02
+    # 2026-01-12 是周一 -> W03
+    "TC-GRAIN-002": (
+        ("expense", 1000, "2026-01-05", "吃饭"),    # W02
+        ("expense", 2000, "2026-01-07", "吃饭"),    # W02 -> 同周合计$30
+        ("expense", 3000, "2026-01-12", "吃饭"),    # W03
+    ),
+    "TC-GRAIN-003": (
+        ("expense", 10000, "2025-11-15", "吃饭"),   # $100
+        ("expense", 20000, "2025-12-10", "吃饭"),   # $200
+        ("expense", 30000, "2026-01-05", "吃饭"),   # $300
+        ("income", 500000, "2025-12-25", "工资"),   # $5000
+    ),
+    "TC-GRAIN-004": (
+        ("expense", 100000, "2025-06-15", "吃饭"),  # $1000
+        ("expense", 200000, "2025-12-10", "吃饭"),  # $2000 -> 2025合计$3000
+        ("expense", 50000, "2026-01-05", "吃饭"),   # $500
+        ("income", 1000000, "2025-07-01", "工资"),  # $10000
+    ),
+    # 日粒度只在首尾有交易；月粒度 2025-12 无交易
+    "TC-CONT-001": (
+        ("expense", 1000, "2026-01-01", "吃饭"),
+        ("expense", 2000, "2026-01-10", "吃饭"),
+        ("expense", 1000, "2025-11-15", "吃饭"),
+        ("expense", 2000, "2026-01-15", "吃饭"),
+    ),
+    # TC-INCOME-001 与 TC-INCOME-002/003 共用
+    "TC-INCOME": (
+        ("expense", 1000, "2026-01-05", "吃饭"),
+        ("income", 5000, "2026-01-05", "工资"),
+    ),
+    "TC-CAT-FILTER-001": (
+        ("expense", 1000, "2026-01-05", "吃饭"),    # $10
+        ("expense", 2000, "2026-01-05", "交通"),    # $20
+        ("expense", 3000, "2026-01-05", "购物"),    # $30
+    ),
+    "TC-CAT-FILTER-002": (
+        ("expense", 1000, "2026-01-05", "吃饭"),    # $10
+        ("expense", 2000, "2026-01-05", "交通"),    # $20
+        ("expense", 3000, "2026-01-07", "吃饭"),    # $30
+        ("income", 5000, "2026-01-05", "工资"),     # $50
+    ),
+    "TC-CAT-FILTER-003": (
+        ("expense", 1000, "2026-01-05", "吃饭"),
+        ("income", 5000, "2026-01-05", "工资"),
+    ),
+    "TC-COMB-001": (
+        ("expense", 1000, "2025-11-15", "吃饭"),    # $10
+        ("expense", 2000, "2025-11-20", "交通"),    # $20
+        ("expense", 3000, "2025-12-10", "吃饭"),    # $30
+        ("expense", 4000, "2025-12-15", "购物"),    # $40
+        ("expense", 5000, "2026-01-05", "吃饭"),    # $50
+        ("income", 100000, "2025-12-25", "工资"),   # $1000
+    ),
+    "TC-COMB-002": (
+        ("expense", 1000, "2026-01-05", "吃饭"),
+        ("expense", 2000, "2026-01-10", "交通"),
+        ("income", 5000, "2026-01-08", "工资"),
+    ),
+}
+
+
+# 快速失败模式：设置 LEDGER_FAIL_FAST 后，首个断言失败即终止剩余测试
+FAIL_FAST = bool(os.environ.get("LEDGER_FAIL_FAST"))
+
+# 设置 LEDGER_WRITE_REPORT=0 时不生成 Markdown 报告（只关心退出码的快速循环）
+WRITE_REPORT = os.environ.get("LEDGER_WRITE_REPORT", "1") != "0"
+
+
+class _FastFail(BaseException):
+    """快速失败模式下首个断言失败时抛出
+    
+    继承 BaseException：测试内部用于捕获被测代码异常的 except Exception
+    不会截获它，快速失败信号总能传到 run_isolated。
+    """
+
+
+class _ErrorList(list):
+    """测试断言错误列表：快速失败模式下追加第一条错误即抛出 _FastFail"""
+    
+    def append(self, message: str) -> None:
+        super().append(message)
+        if FAIL_FAST:
+            raise _FastFail(message)
+    
+    def extend(self, messages: Iterable[str]) -> None:
+        for message in messages:
+            self.append(message)
+
+
+# 单条测试结果（只读记录，按属性访问）
+TestResult = namedtuple("TestResult", "id name status passed details severity")
+
+# 通过用例的输出模板（绝大多数用例走此路径）
+_PASS_LINE = "  ✅ {}: {} - PASS"
+
+# 测试时间格式：每次运行只格式化一次，控制台输出与报告共用
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 按是否通过（False/True）索引的状态文字与标记
+_STATUS = ("❌ FAIL", "✅ PASS")
+_MARK = ("❌", "✅")
+
+# SQL 汇总校验用的分桶表达式（与服务层标签格式一致）
+# ISO 周：取所在周的周四，其年份即 ISO 年，年内序号 (%j-1)/7+1 即 ISO 周数
+_ROLLUP_BINS: Dict[str, str] = {
+    "day": "date",
+    "week": ("printf('%s-W%02d', strftime('%Y', date(date, '-3 days', 'weekday 4')), "
+             "(CAST(strftime('%j', date(date, '-3 days', 'weekday 4')) AS INTEGER) - 1) / 7 + 1)"),
+    "month": "substr(date, 1, 7)",
+    "year": "substr(date, 1, 4)",
+}
 
 class AdvancedTrendTestSuite:
     """趋势图高级交互功能测试套件"""
     
-    def __init__(self):
-        self.results: List[Dict[str, Any]] = []
-        self.temp_dir = None
-        self.db_path = None
-        self.db = None
-        self.stats_service = None
+    def __init__(self, out: Optional[TextIO] = None, timestamp: Optional[str] = None) -> None:
+        self.results: List[TestResult] = []
+        # 测试时间：整个运行（控制台输出与报告）共用同一个时间字符串
+        self.timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        # 输出流：并行运行时每个分组写入各自的缓冲区
+        self.out = out if out is not None else sys.stdout
+        self.db_path = ":memory:"
+        # 数据库与统计服务在 setup() 中创建，测试方法通过同名属性访问
+        self._db: Optional[Database] = None
+        self._stats_service: Optional[StatisticsService] = None
+        # 快速失败模式下是否已因断言失败而终止
+        self.aborted = False
+        # 批量断言用的独立内存连接（不写入被测数据库），首次使用时创建
+        self._check_conn: Optional[sqlite3.Connection] = None
+    
+    @property
+    def db(self) -> Database:
+        """被测数据库（须先调用 setup()）"""
+        assert self._db is not None, "setup() 尚未调用"
+        return self._db
+    
+    @property
+    def stats_service(self) -> StatisticsService:
+        """被测统计服务（须先调用 setup()）"""
+        assert self._stats_service is not None, "setup() 尚未调用"
+        return self._stats_service
         
-    def setup(self):
+    def setup(self) -> None:
         """测试环境准备"""
-        self.temp_dir = tempfile.mkdtemp()
-        self.db_path = os.path.join(self.temp_dir, "test_ledger.db")
-        self.db = Database(self.db_path)
-        self.stats_service = StatisticsService(self.db)
+        # 默认使用内存数据库：无文件读写，进程结束即释放，无需清理；
+        # 传入 --file-db 时在 shm 临时目录中创建真实文件，目录在进程退出时删除
+        if "--file-db" in sys.argv:
+            temp_dir = tempfile.mkdtemp(dir=SHM_DIR)
+            atexit.register(shutil.rmtree, temp_dir, ignore_errors=True)
+            self.db_path = os.path.join(temp_dir, "test_ledger.db")
+        self._db = Database(self.db_path, ephemeral=True)
+        self._stats_service = StatisticsService(self._db)
         
         # 添加测试分类
         test_categories = [
@@ -48,92 +203,191 @@ class AdvancedTrendTestSuite:
             ("工资", "income"),
             ("兼职", "income"),
         ]
-        existing = {c.name for c in self.db.get_all_categories()}
+        # 分类/账户各查询一次，仅缓存名称到 id 的映射；新增项直接使用返回的 id
+        self._cat_ids: Dict[str, Optional[int]] = {c.name: c.id for c in self.db.get_all_categories()}
         for name, cat_type in test_categories:
-            if name not in existing:
+            if name not in self._cat_ids:
                 try:
-                    self.db.add_category(Category(name=name, type=cat_type))
+                    self._cat_ids[name] = self.db.add_category(Category(name=name, type=cat_type))
                 except:
                     pass
         
         # 添加账户
-        existing_acc = {a.name for a in self.db.get_all_accounts()}
-        if "现金" not in existing_acc:
-            self.db.add_account(Account(name="现金", type="cash"))
-        
-        self.categories = {c.name: c for c in self.db.get_all_categories()}
-        self.accounts = {a.name: a for a in self.db.get_all_accounts()}
+        self._acc_ids: Dict[str, Optional[int]] = {a.name: a.id for a in self.db.get_all_accounts()}
+        if "现金" not in self._acc_ids:
+            self._acc_ids["现金"] = self.db.add_account(Account(name="现金", type="cash"))
         
-    def teardown(self):
+    def teardown(self) -> None:
         """清理测试环境"""
-        if self.db:
-            self.db.close()
-        if self.temp_dir:
-            shutil.rmtree(self.temp_dir)
+        if self._db:
+            self._db.close()
+        if self._check_conn:
+            self._check_conn.close()
+            self._check_conn = None
             
-    def reset_db(self):
-        """重置数据库"""
-        if self.db and self.db.conn:
-            cursor = self.db.conn.cursor()
-            cursor.execute("DELETE FROM transactions")
-            self.db.conn.commit()
+    def run_isolated(self, test: Callable[[], None]) -> None:
+        """在隔离作用域内执行单个测试"""
+        # 退出时回滚测试期间的全部写入（SAVEPOINT，不物理删除数据）
+        try:
+            with self.db.rollback_scope():
+                test()
+        except _FastFail as exc:
+            # 测试未执行到 record_result，按文档字符串中的 "ID: 名称" 记录失败；
+            # 剩余测试不再运行，按 Blocker 记录，保证本次运行判定为失败
+            test_id, _, name = (test.__doc__ or "").partition(": ")
+            self.record_result(test_id, name, False, f"快速失败: {exc}", "Blocker")
+            raise
             
-    def add_expense(self, amount_cents: int, date_str: str, category: str = "吃饭") -> int:
+    def load_fixture(self, name: str) -> None:
+        """批量装载 FIXTURES 中的用例数据（备注标记为用例名）"""
+        self.add_transactions_bulk(FIXTURES[name], note=name)
+    
+    def _make_transaction(self, tx_type: str, amount_cents: int, date_str: str,
+                          category: str, note: str) -> Transaction:
+        """构造测试交易（关联分类与现金账户）
+        
+        分类名称需保留：趋势查询按 transactions.category 文本列筛选；
+        账户只需 account_id，统计查询不读取账户名称列。
+        """
+        return Transaction(
+            type=tx_type, amount_cents=amount_cents, date=date_str,
+            category=category, note=note,
+            category_id=self._cat_ids.get(category),
+            account_id=self._acc_ids.get("现金")
+        )
+    
+    def add_transactions_bulk(self, rows: Iterable[tuple], note: str = "测试") -> int:
+        """批量添加交易（一条预编译语句 + 一次提交）
+        
+        Args:
+            rows: [(type, amount_cents, date_str, category), ...]
+            note: 各条交易共用的备注
+        """
+        return self.db.add_transactions(
+            self._make_transaction(tx_type, amount_cents, date_str, category, note)
+            for tx_type, amount_cents, date_str, category in rows
+        )
+    
+    def add_expense(self, amount_cents: int, date_str: str, category: str = "吃饭",
+                    note: str = "测试") -> int:
         """添加支出"""
-        cat = self.categories.get(category)
-        acc = self.accounts.get("现金")
-        tx = Transaction(
-            type="expense", amount_cents=amount_cents, date=date_str,
-            category=category, account="现金", note="测试",
-            category_id=cat.id if cat else None,
-            account_id=acc.id if acc else None
+        return self.db.add_transaction(
+            self._make_transaction("expense", amount_cents, date_str, category, note)
         )
-        return self.db.add_transaction(tx)
     
-    def add_income(self, amount_cents: int, date_str: str, category: str = "工资") -> int:
+    def add_income(self, amount_cents: int, date_str: str, category: str = "工资",
+                   note: str = "测试") -> int:
         """添加收入"""
-        cat = self.categories.get(category)
-        acc = self.accounts.get("现金")
-        tx = Transaction(
-            type="income", amount_cents=amount_cents, date=date_str,
-            category=category, account="现金", note="测试",
-            category_id=cat.id if cat else None,
-            account_id=acc.id if acc else None
+        return self.db.add_transaction(
+            self._make_transaction("income", amount_cents, date_str, category, note)
         )
-        return self.db.add_transaction(tx)
+    
+    def _sql_rollup(self, start: str, end: str, granularity: str,
+                    category: Optional[str] = None) -> Dict[str, tuple]:
+        """直接在数据库中按粒度分桶汇总，返回 {标签: (收入, 支出)}（元）"""
+        conn = self.db.conn
+        assert conn is not None
+        cursor = conn.execute(f"""
+            SELECT {_ROLLUP_BINS[granularity]} AS bin,
+                SUM(CASE WHEN type = 'income' THEN amount_cents ELSE 0 END),
+                SUM(CASE WHEN type = 'expense' AND (? IS NULL OR category = ?)
+                    THEN amount_cents ELSE 0 END)
+            FROM transactions
+            WHERE date >= ? AND date <= ?
+            GROUP BY bin
+        """, (category, category, start, end))
+        return {row[0]: (row[1] / 100.0, row[2] / 100.0) for row in cursor}
+    
+    def _rollup_mismatches(self, result: Dict[str, Any], start: str, end: str,
+                           category: Optional[str] = None) -> List[str]:
+        """将服务层趋势结果与 SQL 分桶汇总逐点对照，返回不一致项"""
+        rollup = self._sql_rollup(start, end, result["granularity"], category)
+        errors = _ErrorList()
+        for item in result["data"]:
+            label = item["label"]
+            expected = rollup.pop(label, (0.0, 0.0))
+            if (item["income"], item["expense"]) != expected:
+                errors.append(
+                    f"{label} 与SQL汇总不一致: 收入/支出 {item['income']}/{item['expense']}，"
+                    f"应为 {expected[0]}/{expected[1]}"
+                )
+        if rollup:
+            errors.append(f"趋势结果缺少时间点: {', '.join(sorted(rollup))}")
+        return errors
+    
+    def _assert_bulk(self, result: Dict[str, Any],
+                     expected_rows: List[tuple]) -> List[str]:
+        """批量核对期望数据点 [(标签, 支出, 收入), ...]
+        
+        期望值与实际结果分别装入独立内存连接中的临时表，一次 EXCEPT 找出全部不一致项。
+        """
+        conn = self._check_conn
+        if conn is None:
+            conn = self._check_conn = sqlite3.connect(":memory:")
+            conn.executescript("""
+                CREATE TABLE expected (label TEXT, expense REAL, income REAL);
+                CREATE TABLE actual (label TEXT, expense REAL, income REAL);
+            """)
+        with conn:
+            conn.execute("DELETE FROM expected")
+            conn.execute("DELETE FROM actual")
+            conn.executemany("INSERT INTO expected VALUES (?, ?, ?)", expected_rows)
+            conn.executemany(
+                "INSERT INTO actual VALUES (?, ?, ?)",
+                ((item["label"], item["expense"], item["income"]) for item in result["data"])
+            )
+            mismatches = conn.execute("""
+                SELECT e.label, e.expense, e.income, a.expense, a.income
+                FROM (SELECT label, expense, income FROM expected
+                      EXCEPT SELECT label, expense, income FROM actual) AS e
+                LEFT JOIN actual AS a ON a.label = e.label
+                ORDER BY e.label
+            """).fetchall()
+        return [
+            f"{label} 支出/收入应为 {expense}/{income}，实际为 {actual_expense}/{actual_income}"
+            for label, expense, income, actual_expense, actual_income in mismatches
+        ]
+    
+    @staticmethod
+    def _by_label(result: Dict[str, Any]) -> Dict[str, Dict[str, Any]]:
+        """按标签索引趋势数据点"""
+        return {item["label"]: item for item in result["data"]}
+    
+    @staticmethod
+    def _nonzero_points(result: Dict[str, Any], field: str,
+                        exclude: frozenset = frozenset()) -> List[Dict[str, Any]]:
+        """返回指定字段不为0的数据点（跳过 exclude 中的标签），一次遍历完成筛选"""
+        return [
+            item for item in result["data"]
+            if item[field] != 0.0 and item["label"] not in exclude
+        ]
     
     def record_result(self, test_id: str, name: str, passed: bool, 
-                      details: str = "", severity: str = "Major"):
+                      details: str = "", severity: str = "Major") -> None:
         """记录测试结果"""
-        status = "PASS" if passed else "FAIL"
-        self.results.append({
-            "id": test_id, "name": name, "status": status,
-            "passed": passed, "details": details, "severity": severity
-        })
-        icon = "✅" if passed else "❌"
-        print(f"  {icon} {test_id}: {name} - {status}")
+        self.results.append(
+            TestResult(test_id, name, "PASS" if passed else "FAIL", passed, details, severity)
+        )
+        if passed:
+            print(_PASS_LINE.format(test_id, name), file=self.out)
+        else:
+            print(f"  ❌ {test_id}: {name} - FAIL", file=self.out)
         if details:
-            print(f"      {details}")
+            print(f"      {details}", file=self.out)
     
     # ==========================================================
     # 5.1 时间粒度选择
     # ==========================================================
     
-    def test_grain_001_daily(self):
+    def test_grain_001_daily(self) -> None:
         """TC-GRAIN-001: 日粒度（Day）"""
-        self.reset_db()
-        
-        # 在多个具体日期新增交易
-        self.add_expense(1000, "2026-01-05")  # $10
-        self.add_expense(2000, "2026-01-05")  # $20 -> 同日合计$30
-        self.add_expense(3000, "2026-01-10")  # $30
-        self.add_income(5000, "2026-01-08")   # $50
+        self.load_fixture("TC-GRAIN-001")
         
         result = self.stats_service.get_trend_data_advanced(
             "2026-01-01", "2026-01-15", "day"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         # 检查粒度
         if result["granularity"] != "day":
@@ -143,21 +397,16 @@ class AdvancedTrendTestSuite:
         if len(result["data"]) != 15:
             errors.append(f"应有15天数据点，实际 {len(result['data'])} 个")
         
-        # 检查聚合正确性
-        data_map = {item["label"]: item for item in result["data"]}
-        
-        if data_map.get("2026-01-05", {}).get("expense") != 30.0:
-            errors.append(f"01-05支出应为30.0，实际为 {data_map.get('2026-01-05', {}).get('expense')}")
-        
-        if data_map.get("2026-01-10", {}).get("expense") != 30.0:
-            errors.append(f"01-10支出应为30.0，实际为 {data_map.get('2026-01-10', {}).get('expense')}")
-        
-        if data_map.get("2026-01-08", {}).get("income") != 50.0:
-            errors.append(f"01-08收入应为50.0，实际为 {data_map.get('2026-01-08', {}).get('income')}")
+        # 检查聚合正确性（01-05 同日合计，01-03 无交易为0）
+        errors.extend(self._assert_bulk(result, [
+            ("2026-01-03", 0.0, 0.0),
+            ("2026-01-05", 30.0, 0.0),
+            ("2026-01-08", 0.0, 50.0),
+            ("2026-01-10", 30.0, 0.0),
+        ]))
         
-        # 检查无交易日为0
-        if data_map.get("2026-01-03", {}).get("expense", -1) != 0.0:
-            errors.append(f"01-03无交易，支出应为0")
+        # 与 SQL 分桶汇总逐点对照
+        errors.extend(self._rollup_mismatches(result, "2026-01-01", "2026-01-15"))
         
         self.record_result(
             "TC-GRAIN-001", "日粒度（Day）",
@@ -166,40 +415,36 @@ class AdvancedTrendTestSuite:
             "Blocker"
         )
     
-    def test_grain_002_weekly(self):
+    def test_grain_002_weekly(self) -> None:
         """TC-GRAIN-002: 周粒度（Week）- ISO周"""
-        self.reset_db()
-        
-        # 2026-01-05 是周一，2026-01-11 是周日 -> 同一周 W02
-        # 2026-01-12 是周一 -> W03
-        self.add_expense(1000, "2026-01-05")  # W02
-        self.add_expense(2000, "2026-01-07")  # W02 -> 同周合计$30
-        self.add_expense(3000, "2026-01-12")  # W03
+        self.load_fixture("TC-GRAIN-002")
         
         result = self.stats_service.get_trend_data_advanced(
             "2026-01-01", "2026-01-18", "week"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         if result["granularity"] != "week":
             errors.append(f"粒度应为 week，实际为 {result['granularity']}")
         
-        data_map = {item["label"]: item for item in result["data"]}
-        
         # 验证ISO周格式
         if not any("W" in item["label"] for item in result["data"]):
             errors.append("周标签格式应包含 W (如 2026-W02)")
         
-        # W02 应聚合为 $30
-        w02_data = data_map.get("2026-W02", {})
-        if w02_data.get("expense") != 30.0:
-            errors.append(f"W02支出应为30.0，实际为 {w02_data.get('expense')}")
+        # 2026-01-01（周四）属于 ISO 2026-W01（2025-12-29 起），跨年周不应归入 2025 年
+        if result["data"] and result["data"][0]["label"] != "2026-W01":
+            errors.append(f"首个周标签应为 2026-W01，实际为 {result['data'][0]['label']}")
         
-        # W03 应为 $30
-        w03_data = data_map.get("2026-W03", {})
-        if w03_data.get("expense") != 30.0:
-            errors.append(f"W03支出应为30.0，实际为 {w03_data.get('expense')}")
+        # W01 无数据，W02、W03 应各聚合为 $30
+        errors.extend(self._assert_bulk(result, [
+            ("2026-W01", 0.0, 0.0),
+            ("2026-W02", 30.0, 0.0),
+            ("2026-W03", 30.0, 0.0),
+        ]))
+        
+        # 与 SQL 分桶汇总逐点对照
+        errors.extend(self._rollup_mismatches(result, "2026-01-01", "2026-01-18"))
         
         self.record_result(
             "TC-GRAIN-002", "周粒度（Week）- ISO周",
@@ -208,21 +453,15 @@ class AdvancedTrendTestSuite:
             "Critical"
         )
     
-    def test_grain_003_monthly(self):
+    def test_grain_003_monthly(self) -> None:
         """TC-GRAIN-003: 月粒度（Month）"""
-        self.reset_db()
-        
-        # 不同月份新增交易
-        self.add_expense(10000, "2025-11-15")  # $100
-        self.add_expense(20000, "2025-12-10")  # $200
-        self.add_expense(30000, "2026-01-05")  # $300
-        self.add_income(500000, "2025-12-25")  # $5000
+        self.load_fixture("TC-GRAIN-003")
         
         result = self.stats_service.get_trend_data_advanced(
             "2025-11-01", "2026-01-31", "month"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         if result["granularity"] != "month":
             errors.append(f"粒度应为 month，实际为 {result['granularity']}")
@@ -231,19 +470,14 @@ class AdvancedTrendTestSuite:
         if len(result["data"]) != 3:
             errors.append(f"应有3个月数据点，实际 {len(result['data'])} 个")
         
-        data_map = {item["label"]: item for item in result["data"]}
-        
-        if data_map.get("2025-11", {}).get("expense") != 100.0:
-            errors.append(f"2025-11支出应为100.0")
-        
-        if data_map.get("2025-12", {}).get("expense") != 200.0:
-            errors.append(f"2025-12支出应为200.0")
-        
-        if data_map.get("2025-12", {}).get("income") != 5000.0:
-            errors.append(f"2025-12收入应为5000.0")
+        errors.extend(self._assert_bulk(result, [
+            ("2025-11", 100.0, 0.0),
+            ("2025-12", 200.0, 5000.0),
+            ("2026-01", 300.0, 0.0),
+        ]))
         
-        if data_map.get("2026-01", {}).get("expense") != 300.0:
-            errors.append(f"2026-01支出应为300.0")
+        # 与 SQL 分桶汇总逐点对照
+        errors.extend(self._rollup_mismatches(result, "2025-11-01", "2026-01-31"))
         
         self.record_result(
             "TC-GRAIN-003", "月粒度（Month）",
@@ -252,21 +486,15 @@ class AdvancedTrendTestSuite:
             "Blocker"
         )
     
-    def test_grain_004_yearly(self):
+    def test_grain_004_yearly(self) -> None:
         """TC-GRAIN-004: 年粒度（Year）"""
-        self.reset_db()
-        
-        # 跨年新增交易
-        self.add_expense(100000, "2025-06-15")  # $1000
-        self.add_expense(200000, "2025-12-10")  # $2000 -> 2025合计$3000
-        self.add_expense(50000, "2026-01-05")   # $500
-        self.add_income(1000000, "2025-07-01")  # $10000
+        self.load_fixture("TC-GRAIN-004")
         
         result = self.stats_service.get_trend_data_advanced(
             "2025-01-01", "2026-12-31", "year"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         if result["granularity"] != "year":
             errors.append(f"粒度应为 year，实际为 {result['granularity']}")
@@ -275,16 +503,13 @@ class AdvancedTrendTestSuite:
         if len(result["data"]) != 2:
             errors.append(f"应有2年数据点，实际 {len(result['data'])} 个")
         
-        data_map = {item["label"]: item for item in result["data"]}
-        
-        if data_map.get("2025", {}).get("expense") != 3000.0:
-            errors.append(f"2025支出应为3000.0，实际为 {data_map.get('2025', {}).get('expense')}")
+        errors.extend(self._assert_bulk(result, [
+            ("2025", 3000.0, 10000.0),
+            ("2026", 500.0, 0.0),
+        ]))
         
-        if data_map.get("2025", {}).get("income") != 10000.0:
-            errors.append(f"2025收入应为10000.0")
-        
-        if data_map.get("2026", {}).get("expense") != 500.0:
-            errors.append(f"2026支出应为500.0")
+        # 与 SQL 分桶汇总逐点对照
+        errors.extend(self._rollup_mismatches(result, "2025-01-01", "2026-12-31"))
         
         self.record_result(
             "TC-GRAIN-004", "年粒度（Year）",
@@ -297,42 +522,34 @@ class AdvancedTrendTestSuite:
     # 5.2 连续性与0值测试
     # ==========================================================
     
-    def test_cont_001_zero_values(self):
+    def test_cont_001_zero_values(self) -> None:
         """TC-CONT-001: 无交易时间点显示为0"""
-        self.reset_db()
-        
-        # 只在首尾有交易
-        self.add_expense(1000, "2026-01-01")
-        self.add_expense(2000, "2026-01-10")
+        self.load_fixture("TC-CONT-001")
         
         # 日粒度
         result_day = self.stats_service.get_trend_data_advanced(
             "2026-01-01", "2026-01-10", "day"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         # 检查连续性
         if len(result_day["data"]) != 10:
             errors.append(f"日粒度应有10天，实际 {len(result_day['data'])} 个")
         
         # 检查中间日期为0
-        for item in result_day["data"]:
-            if item["label"] not in ["2026-01-01", "2026-01-10"]:
-                if item["expense"] != 0.0:
-                    errors.append(f"{item['label']} 无交易但支出不为0: {item['expense']}")
+        errors.extend(
+            f"{item['label']} 无交易但支出不为0: {item['expense']}"
+            for item in self._nonzero_points(result_day, "expense", frozenset({"2026-01-01", "2026-01-10"}))
+        )
         
         # 月粒度也检查连续性
-        self.reset_db()
-        self.add_expense(1000, "2025-11-15")
-        self.add_expense(2000, "2026-01-15")
-        
         result_month = self.stats_service.get_trend_data_advanced(
             "2025-11-01", "2026-01-31", "month"
         )
         
         # 2025-12 应存在且为0
-        data_map = {item["label"]: item for item in result_month["data"]}
+        data_map = self._by_label(result_month)
         if "2025-12" not in data_map:
             errors.append("2025-12 应在数据中（即使为0）")
         elif data_map["2025-12"]["expense"] != 0.0:
@@ -349,26 +566,24 @@ class AdvancedTrendTestSuite:
     # 5.3 收入显示控制（服务层测试）
     # ==========================================================
     
-    def test_income_001_default_show(self):
+    def test_income_001_default_show(self) -> None:
         """TC-INCOME-001: 默认显示收入（验证数据包含收入）"""
-        self.reset_db()
-        
-        self.add_expense(1000, "2026-01-05")
-        self.add_income(5000, "2026-01-05")
+        self.load_fixture("TC-INCOME")
         
         result = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day"
+            "2026-01-05", "2026-01-05", "day"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         # 数据中应包含 income 字段
         has_income = any(item.get("income", 0) > 0 for item in result["data"])
         if not has_income:
             errors.append("数据中应包含收入值")
         
-        data_map = {item["label"]: item for item in result["data"]}
-        if data_map.get("2026-01-05", {}).get("income") != 50.0:
+        data_map = self._by_label(result)
+        jan05 = data_map.get("2026-01-05", _NO_POINT)
+        if jan05.get("income") != 50.0:
             errors.append(f"01-05收入应为50.0")
         
         self.record_result(
@@ -378,24 +593,22 @@ class AdvancedTrendTestSuite:
             "Major"
         )
     
-    def test_income_002_003_toggle(self):
+    def test_income_002_003_toggle(self) -> None:
         """TC-INCOME-002/003: 收入显示切换（UI层逻辑，这里验证数据正确性）"""
         # 注：实际UI层的显示/隐藏由 TrendChartWidget.set_show_income 控制
         # 这里验证数据层始终返回完整数据，UI层控制显示
         
-        self.reset_db()
-        self.add_expense(1000, "2026-01-05")
-        self.add_income(5000, "2026-01-05")
+        self.load_fixture("TC-INCOME")
         
         result = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day"
+            "2026-01-05", "2026-01-05", "day"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         # 数据应同时包含 income 和 expense
-        data_map = {item["label"]: item for item in result["data"]}
-        item = data_map.get("2026-01-05", {})
+        data_map = self._by_label(result)
+        item = data_map.get("2026-01-05", _NO_POINT)
         
         if "income" not in item:
             errors.append("数据应包含 income 字段")
@@ -413,23 +626,19 @@ class AdvancedTrendTestSuite:
     # 5.4 支出类别筛选
     # ==========================================================
     
-    def test_cat_filter_001_all(self):
+    def test_cat_filter_001_all(self) -> None:
         """TC-CAT-FILTER-001: 默认全部支出"""
-        self.reset_db()
-        
-        self.add_expense(1000, "2026-01-05", "吃饭")   # $10
-        self.add_expense(2000, "2026-01-05", "交通")   # $20
-        self.add_expense(3000, "2026-01-05", "购物")   # $30
+        self.load_fixture("TC-CAT-FILTER-001")
         
         # 不传 category 或传 None
         result = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day", None
+            "2026-01-05", "2026-01-05", "day", None
         )
         
-        errors = []
+        errors = _ErrorList()
         
-        data_map = {item["label"]: item for item in result["data"]}
-        total_expense = data_map.get("2026-01-05", {}).get("expense", 0)
+        data_map = self._by_label(result)
+        total_expense = data_map.get("2026-01-05", _NO_POINT).get("expense", 0)
         
         # 应为 10 + 20 + 30 = 60
         if total_expense != 60.0:
@@ -442,34 +651,31 @@ class AdvancedTrendTestSuite:
             "Blocker"
         )
     
-    def test_cat_filter_002_single(self):
+    def test_cat_filter_002_single(self) -> None:
         """TC-CAT-FILTER-002: 单一分类筛选"""
-        self.reset_db()
-        
-        self.add_expense(1000, "2026-01-05", "吃饭")   # $10
-        self.add_expense(2000, "2026-01-05", "交通")   # $20
-        self.add_expense(3000, "2026-01-07", "吃饭")   # $30
-        self.add_income(5000, "2026-01-05")            # $50
+        self.load_fixture("TC-CAT-FILTER-002")
         
         # 筛选 "吃饭" 分类
         result = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day", "吃饭"
+            "2026-01-05", "2026-01-07", "day", "吃饭"
         )
         
-        errors = []
+        errors = _ErrorList()
         
-        data_map = {item["label"]: item for item in result["data"]}
+        data_map = self._by_label(result)
+        jan05 = data_map.get("2026-01-05", _NO_POINT)
+        jan07 = data_map.get("2026-01-07", _NO_POINT)
         
         # 01-05 应只有 吃饭 的 $10
-        if data_map.get("2026-01-05", {}).get("expense") != 10.0:
-            errors.append(f"01-05筛选吃饭后支出应为10.0，实际为 {data_map.get('2026-01-05', {}).get('expense')}")
+        if jan05.get("expense") != 10.0:
+            errors.append(f"01-05筛选吃饭后支出应为10.0，实际为 {jan05.get('expense')}")
         
         # 01-07 应为 $30
-        if data_map.get("2026-01-07", {}).get("expense") != 30.0:
+        if jan07.get("expense") != 30.0:
             errors.append(f"01-07筛选吃饭后支出应为30.0")
         
         # 收入不受影响
-        if data_map.get("2026-01-05", {}).get("income") != 50.0:
+        if jan05.get("income") != 50.0:
             errors.append(f"分类筛选不应影响收入，01-05收入应为50.0")
         
         self.record_result(
@@ -479,33 +685,30 @@ class AdvancedTrendTestSuite:
             "Critical"
         )
     
-    def test_cat_filter_003_no_data(self):
+    def test_cat_filter_003_no_data(self) -> None:
         """TC-CAT-FILTER-003: 分类无数据"""
-        self.reset_db()
-        
-        self.add_expense(1000, "2026-01-05", "吃饭")
-        self.add_income(5000, "2026-01-05")
+        self.load_fixture("TC-CAT-FILTER-003")
         
         # 筛选 "购物" 分类（无数据）
         result = self.stats_service.get_trend_data_advanced(
             "2026-01-01", "2026-01-10", "day", "购物"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         # X轴应连续
         if len(result["data"]) != 10:
             errors.append(f"应有10天数据点，实际 {len(result['data'])} 个")
         
         # 所有支出应为0
-        for item in result["data"]:
-            if item["expense"] != 0.0:
-                errors.append(f"{item['label']} 支出应为0，实际为 {item['expense']}")
-                break
+        nonzero = self._nonzero_points(result, "expense")
+        if nonzero:
+            errors.append(f"{nonzero[0]['label']} 支出应为0，实际为 {nonzero[0]['expense']}")
         
         # 收入不受影响
-        data_map = {item["label"]: item for item in result["data"]}
-        if data_map.get("2026-01-05", {}).get("income") != 50.0:
+        data_map = self._by_label(result)
+        jan05 = data_map.get("2026-01-05", _NO_POINT)
+        if jan05.get("income") != 50.0:
             errors.append("收入应不受分类筛选影响")
         
         self.record_result(
@@ -519,46 +722,44 @@ class AdvancedTrendTestSuite:
     # 5.5 组合场景测试
     # ==========================================================
     
-    def test_comb_001_multi_controls(self):
+    def test_comb_001_multi_controls(self) -> None:
         """TC-COMB-001: 粒度 + 分类组合"""
-        self.reset_db()
-        
-        # 添加跨月数据
-        self.add_expense(1000, "2025-11-15", "吃饭")   # $10
-        self.add_expense(2000, "2025-11-20", "交通")   # $20
-        self.add_expense(3000, "2025-12-10", "吃饭")   # $30
-        self.add_expense(4000, "2025-12-15", "购物")   # $40
-        self.add_expense(5000, "2026-01-05", "吃饭")   # $50
-        self.add_income(100000, "2025-12-25")          # $1000
+        self.load_fixture("TC-COMB-001")
         
         # 月粒度 + 吃饭分类
         result = self.stats_service.get_trend_data_advanced(
             "2025-11-01", "2026-01-31", "month", "吃饭"
         )
         
-        errors = []
+        errors = _ErrorList()
         
         if result["granularity"] != "month":
             errors.append(f"粒度应为 month")
         
-        data_map = {item["label"]: item for item in result["data"]}
+        data_map = self._by_label(result)
+        nov = data_map.get("2025-11", _NO_POINT)
+        dec = data_map.get("2025-12", _NO_POINT)
+        jan = data_map.get("2026-01", _NO_POINT)
         
         # 2025-11 吃饭: $10
-        if data_map.get("2025-11", {}).get("expense") != 10.0:
-            errors.append(f"2025-11吃饭支出应为10.0，实际为 {data_map.get('2025-11', {}).get('expense')}")
+        if nov.get("expense") != 10.0:
+            errors.append(f"2025-11吃饭支出应为10.0，实际为 {nov.get('expense')}")
         
         # 2025-12 吃饭: $30
-        if data_map.get("2025-12", {}).get("expense") != 30.0:
-            errors.append(f"2025-12吃饭支出应为30.0，实际为 {data_map.get('2025-12', {}).get('expense')}")
+        if dec.get("expense") != 30.0:
+            errors.append(f"2025-12吃饭支出应为30.0，实际为 {dec.get('expense')}")
         
         # 2026-01 吃饭: $50
-        if data_map.get("2026-01", {}).get("expense") != 50.0:
-            errors.append(f"2026-01吃饭支出应为50.0，实际为 {data_map.get('2026-01', {}).get('expense')}")
+        if jan.get("expense") != 50.0:
+            errors.append(f"2026-01吃饭支出应为50.0，实际为 {jan.get('expense')}")
         
         # 收入应不受影响
-        if data_map.get("2025-12", {}).get("income") != 1000.0:
+        if dec.get("income") != 1000.0:
             errors.append(f"2025-12收入应为1000.0")
         
+        # 与 SQL 分桶汇总逐点对照
+        errors.extend(self._rollup_mismatches(result, "2025-11-01", "2026-01-31", "吃饭"))
+        
         self.record_result(
             "TC-COMB-001", "粒度 + 分类组合",
             len(errors) == 0,
@@ -566,15 +767,11 @@ class AdvancedTrendTestSuite:
             "Blocker"
         )
     
-    def test_comb_002_rapid_switch(self):
+    def test_comb_002_rapid_switch(self) -> None:
         """TC-COMB-002: 快速切换（模拟）"""
-        self.reset_db()
+        self.load_fixture("TC-COMB-002")
         
-        self.add_expense(1000, "2026-01-05", "吃饭")
-        self.add_expense(2000, "2026-01-10", "交通")
-        self.add_income(5000, "2026-01-08")
-        
-        errors = []
+        errors = _ErrorList()
         
         # 模拟快速切换：连续调用不同参数
         try:
@@ -602,26 +799,24 @@ class AdvancedTrendTestSuite:
     # 5.6 数据变更同步
     # ==========================================================
     
-    def test_sync_001_add(self):
+    def test_sync_001_add(self) -> None:
         """TC-SYNC-001: 新增交易"""
-        self.reset_db()
-        
         result_before = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day"
+            "2026-01-05", "2026-01-05", "day"
         )
-        before_map = {item["label"]: item for item in result_before["data"]}
-        initial = before_map.get("2026-01-05", {}).get("expense", 0)
+        before_map = self._by_label(result_before)
+        initial = before_map.get("2026-01-05", _NO_POINT).get("expense", 0)
         
         # 新增
         self.add_expense(5000, "2026-01-05")
         
         result_after = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day"
+            "2026-01-05", "2026-01-05", "day"
         )
-        after_map = {item["label"]: item for item in result_after["data"]}
-        final = after_map.get("2026-01-05", {}).get("expense", 0)
+        after_map = self._by_label(result_after)
+        final = after_map.get("2026-01-05", _NO_POINT).get("expense", 0)
         
-        errors = []
+        errors = _ErrorList()
         if final != initial + 50.0:
             errors.append(f"新增后支出应为 {initial + 50.0}，实际为 {final}")
         
@@ -632,28 +827,28 @@ class AdvancedTrendTestSuite:
             "Major"
         )
     
-    def test_sync_002_modify(self):
+    def test_sync_002_modify(self) -> None:
         """TC-SYNC-002: 修改交易"""
-        self.reset_db()
-        
         tx_id = self.add_expense(5000, "2026-01-05")
         
         result_before = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day"
+            "2026-01-05", "2026-01-05", "day"
         )
         
         # 修改金额
         tx = self.db.get_transaction_by_id(tx_id)
+        assert tx is not None
         tx.amount_cents = 10000
         self.db.update_transaction(tx)
         
         result_after = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day"
+            "2026-01-05", "2026-01-05", "day"
         )
-        after_map = {item["label"]: item for item in result_after["data"]}
+        after_map = self._by_label(result_after)
+        after_jan05 = after_map.get("2026-01-05", _NO_POINT)
         
-        errors = []
-        if after_map.get("2026-01-05", {}).get("expense") != 100.0:
+        errors = _ErrorList()
+        if after_jan05.get("expense") != 100.0:
             errors.append(f"修改后支出应为100.0")
         
         self.record_result(
@@ -663,27 +858,26 @@ class AdvancedTrendTestSuite:
             "Major"
         )
     
-    def test_sync_003_delete(self):
+    def test_sync_003_delete(self) -> None:
         """TC-SYNC-003: 删除交易"""
-        self.reset_db()
-        
         tx_id = self.add_expense(5000, "2026-01-05")
         self.add_expense(3000, "2026-01-05")
         
         result_before = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day"
+            "2026-01-05", "2026-01-05", "day"
         )
         
         # 删除一笔
         self.db.delete_transaction(tx_id)
         
         result_after = self.stats_service.get_trend_data_advanced(
-            "2026-01-01", "2026-01-10", "day"
+            "2026-01-05", "2026-01-05", "day"
         )
-        after_map = {item["label"]: item for item in result_after["data"]}
+        after_map = self._by_label(result_after)
+        after_jan05 = after_map.get("2026-01-05", _NO_POINT)
         
-        errors = []
-        if after_map.get("2026-01-05", {}).get("expense") != 30.0:
+        errors = _ErrorList()
+        if after_jan05.get("expense") != 30.0:
             errors.append(f"删除后支出应为30.0")
         
         self.record_result(
@@ -693,16 +887,66 @@ class AdvancedTrendTestSuite:
             "Major"
         )
     
+    def test_sync_004_cache_invalidation(self) -> None:
+        """TC-SYNC-004: 趋势缓存随各写入路径失效"""
+        # conn.rollback() 会撤销 rollback_scope 的保存点，因此使用独立的数据库
+        with Database(":memory:", ephemeral=True) as own_db:
+            stats = StatisticsService(own_db)
+            
+            def expense_on_jan05() -> Any:
+                result = stats.get_trend_data_advanced("2026-01-05", "2026-01-05", "day")
+                return self._by_label(result).get("2026-01-05", _NO_POINT).get("expense")
+            
+            errors = _ErrorList()
+            
+            def expect(step: str, value: float) -> None:
+                actual = expense_on_jan05()
+                if actual != value:
+                    errors.append(f"{step}后支出应为{value}，实际为{actual}")
+            
+            # 每一步写入前先查询一次，使结果进入缓存
+            expect("初始", 0.0)
+            own_db.add_transactions([
+                Transaction(type="expense", amount_cents=5000, date="2026-01-05", category="吃饭"),
+            ])
+            expect("批量新增", 50.0)
+            
+            tx_id = own_db.get_all_transactions()[0].id
+            assert tx_id is not None
+            own_db.patch_transaction(tx_id, amount_cents=8000)
+            expect("局部更新", 80.0)
+            
+            own_db.delete_transaction(tx_id)
+            expect("删除", 0.0)
+            
+            # 直接通过连接写入且不提交，随后整体回滚
+            conn = own_db.conn
+            assert conn is not None
+            conn.execute(
+                "INSERT INTO transactions (type, amount_cents, date, created_at) VALUES (?, ?, ?, ?)",
+                ("expense", 2000, "2026-01-05", "2026-01-05 00:00:00")
+            )
+            expect("未提交写入", 20.0)
+            conn.rollback()
+            expect("回滚", 0.0)
+        
+        self.record_result(
+            "TC-SYNC-004", "趋势缓存随各写入路径失效",
+            len(errors) == 0,
+            "; ".join(errors) if errors else "新增、局部更新、删除、回滚后趋势数据均随之更新",
+            "Major"
+        )
+    
     # ==========================================================
     # 5.7 主题可读性（代码检查）
     # ==========================================================
     
-    def test_theme_001_002(self):
+    def test_theme_001_002(self) -> None:
         """TC-THEME-001/002: 深色/浅色模式可读性（代码检查）"""
         # 验证代码中使用了动态主题色
         from ledger.ui.theme import COLOR_INCOME, COLOR_EXPENSE, get_text_color
         
-        errors = []
+        errors = _ErrorList()
         
         # 检查颜色定义
         if COLOR_INCOME == COLOR_EXPENSE:
@@ -723,117 +967,120 @@ class AdvancedTrendTestSuite:
             "Major"
         )
     
-    def run_all_tests(self):
-        """运行所有测试"""
-        print("\n" + "=" * 70)
-        print("Ledger App - 收支趋势图高级交互功能测试")
-        print("Phase 1.x - Advanced Trend Chart Test Suite")
-        print(f"测试时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 70)
-        
+    # 测试分组：(标题, 测试方法名, 是否需要 Qt)
+    SECTIONS = (
+        ("5.1 时间粒度选择", ("test_grain_001_daily", "test_grain_002_weekly",
+                              "test_grain_003_monthly", "test_grain_004_yearly"), False),
+        ("5.2 连续性与0值测试", ("test_cont_001_zero_values",), False),
+        ("5.3 收入显示控制", ("test_income_001_default_show", "test_income_002_003_toggle"), False),
+        ("5.4 支出类别筛选", ("test_cat_filter_001_all", "test_cat_filter_002_single",
+                              "test_cat_filter_003_no_data"), False),
+        ("5.5 组合场景测试", ("test_comb_001_multi_controls", "test_comb_002_rapid_switch"), False),
+        ("5.6 数据变更同步", ("test_sync_001_add", "test_sync_002_modify", "test_sync_003_delete",
+                              "test_sync_004_cache_invalidation"), False),
+        ("5.7 主题可读性", ("test_theme_001_002",), True),
+    )
+    
+    def run_sections(self, sections: Iterable[tuple]) -> None:
+        """在本实例的数据库上依次运行若干测试分组"""
         try:
             self.setup()
-            
-            print("\n📊 5.1 时间粒度选择")
-            print("-" * 50)
-            self.test_grain_001_daily()
-            self.test_grain_002_weekly()
-            self.test_grain_003_monthly()
-            self.test_grain_004_yearly()
-            
-            print("\n📊 5.2 连续性与0值测试")
-            print("-" * 50)
-            self.test_cont_001_zero_values()
-            
-            print("\n📊 5.3 收入显示控制")
-            print("-" * 50)
-            self.test_income_001_default_show()
-            self.test_income_002_003_toggle()
-            
-            print("\n📊 5.4 支出类别筛选")
-            print("-" * 50)
-            self.test_cat_filter_001_all()
-            self.test_cat_filter_002_single()
-            self.test_cat_filter_003_no_data()
-            
-            print("\n📊 5.5 组合场景测试")
-            print("-" * 50)
-            self.test_comb_001_multi_controls()
-            self.test_comb_002_rapid_switch()
-            
-            print("\n📊 5.6 数据变更同步")
-            print("-" * 50)
-            self.test_sync_001_add()
-            self.test_sync_002_modify()
-            self.test_sync_003_delete()
-            
-            print("\n📊 5.7 主题可读性")
-            print("-" * 50)
-            self.test_theme_001_002()
-            
+            for title, test_names, _ in sections:
+                print(f"\n📊 {title}", file=self.out)
+                print("-" * 50, file=self.out)
+                for test_name in test_names:
+                    self.run_isolated(getattr(self, test_name))
+        except _FastFail:
+            print("\n⏹ 快速失败模式：已终止剩余测试", file=self.out)
+            self.aborted = True
         finally:
             self.teardown()
+    
+    def run_all_tests(self) -> Dict[str, Any]:
+        """运行所有测试
+        
+        无需 Qt 的分组各自使用独立的内存数据库并行运行，输出按分组顺序回放；
+        需要 Qt 的分组在主线程运行。
+        """
+        print("\n" + "=" * 70, file=self.out)
+        print("Ledger App - 收支趋势图高级交互功能测试", file=self.out)
+        print("Phase 1.x - Advanced Trend Chart Test Suite", file=self.out)
+        print(f"测试时间: {self.timestamp}", file=self.out)
+        print("=" * 70, file=self.out)
+        
+        core_sections = [sec for sec in self.SECTIONS if not sec[2]]
+        qt_sections = [sec for sec in self.SECTIONS if sec[2]]
+        
+        # 核心分组按批次并行运行：每个线程只建一个数据库连接，批次内各测试由回滚作用域隔离
+        for worker, output in run_sections_parallel(core_sections, AdvancedTrendTestSuite):
+            self.out.write(output)
+            self.results.extend(worker.results)
+            self.aborted |= worker.aborted
+        
+        if not self.aborted:
+            self.run_sections(qt_sections)
         
         return self.generate_report()
     
     def generate_report(self) -> Dict[str, Any]:
         """生成测试报告"""
         total = len(self.results)
-        passed = sum(1 for r in self.results if r["passed"])
+        passed = sum(1 for r in self.results if r.passed)
         failed = total - passed
         
-        failures_by_severity = {}
+        failures_by_severity: Dict[str, int] = {}
         for r in self.results:
-            if not r["passed"]:
-                sev = r["severity"]
+            if not r.passed:
+                sev = r.severity
                 failures_by_severity[sev] = failures_by_severity.get(sev, 0) + 1
         
-        print("\n" + "=" * 70)
-        print("测试结果汇总")
-        print("=" * 70)
-        print(f"总测试数: {total}")
-        print(f"通过: {passed} ✅")
-        print(f"失败: {failed} ❌")
-        print(f"通过率: {passed/total*100:.1f}%")
+        print("\n" + "=" * 70, file=self.out)
+        print("测试结果汇总", file=self.out)
+        print("=" * 70, file=self.out)
+        print(f"总测试数: {total}", file=self.out)
+        print(f"通过: {passed} ✅", file=self.out)
+        print(f"失败: {failed} ❌", file=self.out)
+        print(f"通过率: {passed/total*100:.1f}%", file=self.out)
         
         if failures_by_severity:
-            print("\n失败分布:")
+            print("\n失败分布:", file=self.out)
             for sev, count in failures_by_severity.items():
-                print(f"  - {sev}: {count}")
+                print(f"  - {sev}: {count}", file=self.out)
         
         if failed > 0:
-            print("\n❌ 失败用例详情:")
-            print("-" * 50)
+            print("\n❌ 失败用例详情:", file=self.out)
+            print("-" * 50, file=self.out)
             for r in self.results:
-                if not r["passed"]:
-                    print(f"  [{r['severity']}] {r['id']}: {r['name']}")
-                    print(f"    详情: {r['details']}")
+                if not r.passed:
+                    print(f"  [{r.severity}] {r.id}: {r.name}", file=self.out)
+                    print(f"    详情: {r.details}", file=self.out)
         
-        print("\n" + "=" * 70)
-        print("QA 结论")
-        print("=" * 70)
+        print("\n" + "=" * 70, file=self.out)
+        print("QA 结论", file=self.out)
+        print("=" * 70, file=self.out)
         
         blockers = failures_by_severity.get("Blocker", 0)
         criticals = failures_by_severity.get("Critical", 0)
         
         if blockers > 0:
-            print("🚫 存在 Blocker 级别缺陷，功能不可用")
+            print("🚫 存在 Blocker 级别缺陷，功能不可用", file=self.out)
             qa_conclusion = "BLOCKED"
         elif criticals > 0:
-            print("⚠️ 存在 Critical 级别缺陷，功能部分受影响")
+            print("⚠️ 存在 Critical 级别缺陷，功能部分受影响", file=self.out)
             qa_conclusion = "CONDITIONAL"
         elif failed > 0:
-            print("⚠️ 存在 Major/Minor 级别缺陷")
+            print("⚠️ 存在 Major/Minor 级别缺陷", file=self.out)
             qa_conclusion = "PASS_WITH_ISSUES"
         else:
-            print("✅ 所有测试通过")
-            print("   趋势图增强功能：可信 + 连续 + 可控")
+            print("✅ 所有测试通过", file=self.out)
+            print("   趋势图增强功能：可信 + 连续 + 可控", file=self.out)
             qa_conclusion = "PASS"
         
-        print("\n确认结论:")
-        print("  - 周粒度符合 ISO 规则（周一开始）: " + ("✅" if not any(r["id"] == "TC-GRAIN-002" and not r["passed"] for r in self.results) else "❌"))
-        print("  - 连续性满足预期: " + ("✅" if not any(r["id"] == "TC-CONT-001" and not r["passed"] for r in self.results) else "❌"))
-        print("  - 组合交互稳定: " + ("✅" if not any("COMB" in r["id"] and not r["passed"] for r in self.results) else "❌"))
+        grain_ok, cont_ok, comb_ok = _qa_flags(self.results)
+        print("\n确认结论:", file=self.out)
+        print("  - 周粒度符合 ISO 规则（周一开始）: " + _MARK[grain_ok], file=self.out)
+        print("  - 连续性满足预期: " + _MARK[cont_ok], file=self.out)
+        print("  - 组合交互稳定: " + _MARK[comb_ok], file=self.out)
         
         return {
             "total": total,
@@ -845,58 +1092,113 @@ class AdvancedTrendTestSuite:
         }
 
 
-def main():
-    suite = AdvancedTrendTestSuite()
-    report = suite.run_all_tests()
+# 报告详情列的最大宽度；按是否超长（False/True）索引截断后缀
+_DETAILS_WIDTH = 60
+_TRUNCATION_SUFFIX = ("", "...")
+
+# 测试用例详情表的行模板：ID | 测试项 | 状态 | 严重级别 | 详情
+_ROW_TMPL = "| {} | {} | {} | {} | {} |\n"
+
+# 报告中的固定段落
+_RESULTS_HEADER = (
+    "\n---\n\n"
+    "## 测试用例详情\n\n"
+    "| ID | 测试项 | 状态 | 严重级别 | 详情 |\n"
+    "|-----|--------|------|----------|------|\n"
+)
+_QA_HEADER = (
+    "\n---\n\n"
+    "## QA 确认结论\n\n"
+    "| 确认项 | 结果 |\n"
+    "|--------|------|\n"
+)
+_MANUAL_SECTION = (
+    "\n---\n\n"
+    "## 手动验证项\n\n"
+    "以下测试项需要手动验证：\n\n"
+    "### TC-THEME-001: 浅色模式可读性\n"
+    "- [ ] 折线、坐标、图例、控件清晰\n\n"
+    "### TC-THEME-002: 深色模式可读性\n"
+    "- [ ] 折线与背景对比明显\n"
+    "- [ ] 控件文字清晰\n\n"
+    "---\n\n"
+)
+
+
+def _qa_flags(results: Iterable[TestResult]) -> Tuple[bool, bool, bool]:
+    """一次遍历得到三项 QA 确认结论：(周粒度符合ISO, 连续性满足预期, 组合交互稳定)"""
+    grain_ok = cont_ok = comb_ok = True
+    for rid, _, _, passed, _, _ in results:
+        if not passed:
+            if rid == "TC-GRAIN-002":
+                grain_ok = False
+            elif rid == "TC-CONT-001":
+                cont_ok = False
+            if "COMB" in rid:
+                comb_ok = False
+    return grain_ok, cont_ok, comb_ok
+
+
+def _report_rows(results: Iterable[TestResult]) -> Iterator[str]:
+    """逐行生成测试用例详情表（详情超过 _DETAILS_WIDTH 字截断）"""
+    for rid, name, _, passed, d, severity in results:
+        details = d[:_DETAILS_WIDTH] + _TRUNCATION_SUFFIX[len(d) > _DETAILS_WIDTH]
+        yield _ROW_TMPL.format(rid, name, _STATUS[passed], severity, details)
+
+
+def _render_report(report: Dict[str, Any], timestamp: str) -> str:
+    """将测试报告渲染为完整的 Markdown 文本（各段先收集到列表，最后一次拼接）"""
+    results = report["results"]
+    qa_conclusion = report["qa_conclusion"]
     
-    # 保存测试报告
-    report_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "TEST_REPORT_TREND_ADVANCED.md"
-    )
+    parts = [
+        "# Ledger App - 收支趋势图高级交互功能测试报告\n\n",
+        f"**测试时间**: {timestamp}\n\n",
+        "**测试版本**: Phase 1.x（趋势图增强）\n\n"
+        "---\n\n"
+        "## 测试结果汇总\n\n"
+        "| 指标 | 结果 |\n"
+        "|------|------|\n",
+        f"| 总测试数 | {report['total']} |\n",
+        f"| 通过 | {report['passed']} ✅ |\n",
+        f"| 失败 | {report['failed']} ❌ |\n",
+        f"| 通过率 | {report['pass_rate']:.1f}% |\n",
+        f"| QA结论 | **{qa_conclusion}** |\n",
+        _RESULTS_HEADER,
+    ]
+    parts.extend(_report_rows(results))
     
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write("# Ledger App - 收支趋势图高级交互功能测试报告\n\n")
-        f.write(f"**测试时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        f.write(f"**测试版本**: Phase 1.x（趋势图增强）\n\n")
-        f.write("---\n\n")
-        f.write("## 测试结果汇总\n\n")
-        f.write(f"| 指标 | 结果 |\n")
-        f.write(f"|------|------|\n")
-        f.write(f"| 总测试数 | {report['total']} |\n")
-        f.write(f"| 通过 | {report['passed']} ✅ |\n")
-        f.write(f"| 失败 | {report['failed']} ❌ |\n")
-        f.write(f"| 通过率 | {report['pass_rate']:.1f}% |\n")
-        f.write(f"| QA结论 | **{report['qa_conclusion']}** |\n")
-        f.write("\n---\n\n")
-        f.write("## 测试用例详情\n\n")
-        f.write("| ID | 测试项 | 状态 | 严重级别 | 详情 |\n")
-        f.write("|-----|--------|------|----------|------|\n")
-        for r in report["results"]:
-            status = "✅ PASS" if r["passed"] else "❌ FAIL"
-            details = r["details"][:60] + "..." if len(r["details"]) > 60 else r["details"]
-            f.write(f"| {r['id']} | {r['name']} | {status} | {r['severity']} | {details} |\n")
-        
-        f.write("\n---\n\n")
-        f.write("## QA 确认结论\n\n")
-        f.write("| 确认项 | 结果 |\n")
-        f.write("|--------|------|\n")
-        f.write(f"| 周粒度符合 ISO 规则 | {'✅' if not any(r['id'] == 'TC-GRAIN-002' and not r['passed'] for r in report['results']) else '❌'} |\n")
-        f.write(f"| 连续性满足预期 | {'✅' if not any(r['id'] == 'TC-CONT-001' and not r['passed'] for r in report['results']) else '❌'} |\n")
-        f.write(f"| 组合交互稳定 | {'✅' if not any('COMB' in r['id'] and not r['passed'] for r in report['results']) else '❌'} |\n")
-        
-        f.write("\n---\n\n")
-        f.write("## 手动验证项\n\n")
-        f.write("以下测试项需要手动验证：\n\n")
-        f.write("### TC-THEME-001: 浅色模式可读性\n")
-        f.write("- [ ] 折线、坐标、图例、控件清晰\n\n")
-        f.write("### TC-THEME-002: 深色模式可读性\n")
-        f.write("- [ ] 折线与背景对比明显\n")
-        f.write("- [ ] 控件文字清晰\n\n")
-        f.write("---\n\n")
-        f.write(f"*报告生成时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}*\n")
-    
-    print(f"\n📄 测试报告已保存至: {report_path}")
+    grain_ok, cont_ok, comb_ok = _qa_flags(results)
+    parts += [
+        _QA_HEADER,
+        f"| 周粒度符合 ISO 规则 | {_MARK[grain_ok]} |\n",
+        f"| 连续性满足预期 | {_MARK[cont_ok]} |\n",
+        f"| 组合交互稳定 | {_MARK[comb_ok]} |\n",
+        _MANUAL_SECTION,
+        f"*报告生成时间: {timestamp}*\n",
+    ]
+    return "".join(parts)
+
+
+def main() -> int:
+    # 测试时间只取一次，传给测试套件并用于报告头尾
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    # 运行期间的输出先写入缓冲区，结束后一次性输出（异常退出时同样输出已有内容）
+    out = io.StringIO()
+    suite = AdvancedTrendTestSuite(out=out, timestamp=timestamp)
+    try:
+        report = suite.run_all_tests()
+    finally:
+        sys.stdout.write(out.getvalue())
+    
+    # 保存测试报告（退出码不受影响）
+    if WRITE_REPORT:
+        report_path = _HERE / "TEST_REPORT_TREND_ADVANCED.md"
+        
+        # 一次编码为 UTF-8 后直接写入文件描述符，不经过 Python 的文本层与缓冲层
+        write_bytes(report_path, _render_report(report, timestamp).encode("utf-8"))
+        
+        print(f"\n📄 测试报告已保存至: {report_path}")
     
     return 0 if report["qa_conclusion"] in ["PASS", "PASS_WITH_ISSUES"] else 1
 
@@ -6,10 +6,11 @@ Phase 1.x - Trend Chart Test Suite
 
 import sys
 import os
-import tempfile
-import shutil
+from calendar import monthrange
+from collections import Counter
 from datetime import date, datetime, timedelta
-from typing import Dict, Any, List
+from operator import itemgetter
+from typing import Dict, Any, Iterable, List, Optional, TextIO
 
 # Add the 'src' directory to sys.path
 script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -23,26 +24,168 @@ from ledger.models.account import Account
 from ledger.services.statistics_service import StatisticsService
 from ledger.ui.theme import COLOR_INCOME, COLOR_EXPENSE, CHART_COLORS
 
+from suite_helpers import run_sections_parallel, write_bytes
+
+# 测试时间格式：每次运行只格式化一次，控制台输出与报告共用
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# 视为通过（退出码 0）的 QA 结论
+_PASS_CONCLUSIONS = frozenset({"PASS", "PASS_WITH_ISSUES"})
+
+# 报告路径：导入时确定一次（与本文件同目录）
+REPORT_PATH = os.path.join(script_dir, "TEST_REPORT_TREND_CHART.md")
+
+# 设置 LEDGER_WRITE_REPORT=0 时不生成 Markdown 报告（只关心退出码的快速循环）
+WRITE_REPORT = os.environ.get("LEDGER_WRITE_REPORT", "1") != "0"
+
+# 报告头部（标题、汇总表与用例表头），各字段一次填入
+_REPORT_HEADER_TMPL = (
+    "# Ledger App - 收支趋势图功能测试报告\n\n"
+    "**测试时间**: {timestamp}\n\n"
+    "**测试版本**: Phase 1.x\n\n"
+    "---\n\n"
+    "## 测试结果汇总\n\n"
+    "| 指标 | 结果 |\n"
+    "|------|------|\n"
+    "| 总测试数 | {total} |\n"
+    "| 通过 | {passed} ✅ |\n"
+    "| 失败 | {failed} ❌ |\n"
+    "| 通过率 | {pass_rate:.1f}% |\n"
+    "| QA结论 | **{qa_conclusion}** |\n"
+    "\n---\n\n"
+    "## 测试用例详情\n\n"
+    "| ID | 测试项 | 状态 | 严重级别 | 详情 |\n"
+    "|-----|--------|------|----------|------|\n"
+)
+
+# 报告中的固定段落（导入时即编码为 UTF-8）
+_QA_HEADER = (
+    "\n---\n\n"
+    "## QA 建议\n\n"
+).encode("utf-8")
+_QA_ALL_PASSED = (
+    "✅ **趋势图功能测试全部通过**\n\n"
+    "功能表现：\n"
+    "- 数据聚合：按天/按月聚合正确\n"
+    "- 时间连续性：无断点，无交易日期显示为0\n"
+    "- 粒度切换：≤31天按天，>31天按月，自动切换\n"
+    "- 数据同步：新增/修改/删除后正确刷新\n"
+    "- 与统计页一致性：趋势图总额与汇总一致\n\n"
+    "**建议**: 可进入下一阶段开发\n"
+).encode("utf-8")
+_QA_HAS_ISSUES = "⚠️ **存在待修复问题**\n\n".encode("utf-8")
+# 需手动验证的主题可读性检查项
+_MANUAL_SECTION = (
+    "\n---\n\n"
+    "## 手动验证项\n\n"
+    "以下测试项需要手动验证：\n\n"
+    "### TC-TREND-011: 浅色模式可读性\n"
+    "- [ ] 折线、坐标轴、文字清晰\n"
+    "- [ ] 无颜色冲突\n"
+    "- [ ] 收入线（绿）与支出线（红）区分明显\n\n"
+    "### TC-TREND-012: 深色模式可读性\n"
+    "- [ ] 折线与背景对比明显\n"
+    "- [ ] 坐标刻度、图例、标题可读\n"
+    "- [ ] 不出现黑线黑底或白线白底\n\n"
+    "---\n\n"
+).encode("utf-8")
+
+# 用例表的一行（bytes 模板，各字段以 %b 填入）；详情超过 _DETAILS_WIDTH 个字符时截断
+_ROW_TMPL = b"| %b | %b | %b | %b | %b |\n"
+_DETAILS_WIDTH = 80
+
+# 按是否通过（False/True）索引的状态文字（已编码，每行直接引用）
+_STATUS = ("❌ FAIL".encode("utf-8"), "✅ PASS".encode("utf-8"))
+
+# 一次取出结果字典中生成表格行所需的字段
+_row_fields = itemgetter("id", "name", "passed", "severity", "details")
+
+
+def _get_points(result: Dict[str, Any], labels) -> Dict[str, Dict[str, Any]]:
+    """只取出关心的几个标签对应的数据点（一次扫描，不为整条序列建索引）"""
+    wanted = set(labels)
+    return {it["label"]: it for it in result["data"] if it["label"] in wanted}
+
+
+def _val(points: Dict[str, Dict[str, Any]], label: str, key: str) -> float:
+    """取某个标签的收入/支出值，标签不存在时为 0"""
+    item = points.get(label)
+    return item[key] if item else 0.0
+
+
+def _sorted_diff(expected: List[str], actual: List[str]):
+    """两个已排序、无重复的序列做一次归并，返回 (expected 独有, actual 独有)"""
+    missing, extra = [], []
+    i = j = 0
+    while i < len(expected) and j < len(actual):
+        if expected[i] == actual[j]:
+            i += 1
+            j += 1
+        elif expected[i] < actual[j]:
+            missing.append(expected[i])
+            i += 1
+        else:
+            extra.append(actual[j])
+            j += 1
+    missing.extend(expected[i:])
+    extra.extend(actual[j:])
+    return missing, extra
+
+
+def _aggregation_mismatches(result: Dict[str, Any], rows, label_of=lambda d: d) -> List[str]:
+    """在本地按标签汇总写入的交易（单位：分），与趋势数据逐点比较
+    
+    Args:
+        rows: 与 add_transactions_bulk 相同的 [(type, amount_cents, date_str, category), ...]
+        label_of: 日期到趋势标签的映射（按月聚合时取 YYYY-MM）
+    """
+    expected = Counter()
+    for tx_type, amount_cents, date_str, _ in rows:
+        expected[label_of(date_str), tx_type] += amount_cents
+    
+    errors = []
+    for item in result["data"]:
+        for tx_type, name in (("income", "收入"), ("expense", "支出")):
+            want = expected[item["label"], tx_type] / 100.0
+            if item[tx_type] != want:
+                errors.append(f"{item['label']} {name}应为 {want}，实际为 {item[tx_type]}")
+    labels = {item["label"] for item in result["data"]}
+    errors.extend(
+        f"{label} 未在趋势数据中"
+        for label in sorted({label for label, _ in expected} - labels)
+    )
+    return errors
+
 
 class TrendChartTestSuite:
     """趋势图功能测试套件"""
     
-    def __init__(self):
+    def __init__(self, out: Optional[TextIO] = None, timestamp: Optional[str] = None):
         self.results: List[Dict[str, Any]] = []
-        self.temp_dir = None
-        self.db_path = None
+        # 测试时间：整个运行（控制台输出与报告）共用同一个时间字符串
+        self.timestamp = timestamp or datetime.now().strftime(TIMESTAMP_FORMAT)
+        # 输出流：并行运行时每个分组写入各自的缓冲区
+        self.out = out if out is not None else sys.stdout
+        self.db_path = ":memory:"
         self.db = None
         self.stats_service = None
         
     def setup(self):
         """测试环境准备"""
-        self.temp_dir = tempfile.mkdtemp()
-        self.db_path = os.path.join(self.temp_dir, "test_ledger.db")
-        self.db = Database(self.db_path)
+        # 本月各日的日期字符串只格式化一次，_day_strs[d - 1] 为 d 号
+        today = date.today()
+        self._day_strs: List[str] = [
+            date(today.year, today.month, d).isoformat()
+            for d in range(1, monthrange(today.year, today.month)[1] + 1)
+        ]
+        
+        # 内存数据库：无文件读写，进程结束即释放，无需清理临时目录
+        self.db = Database(self.db_path, ephemeral=True)
         self.stats_service = StatisticsService(self.db)
         
-        # 检查是否已有默认分类（V3迁移已创建）
-        existing_categories = {c.name for c in self.db.get_all_categories()}
+        # 分类/账户各查询一次（V3迁移已创建默认分类），仅缓存名称到 id 的映射；
+        # 新增项直接使用返回的 id，之后各测试不再查询这两张表
+        self._cat_ids: Dict[str, int] = {c.name: c.id for c in self.db.get_all_categories()}
         
         # 只添加缺失的分类
         test_categories = [
@@ -51,62 +194,64 @@ class TrendChartTestSuite:
             ("工资", "income"),
         ]
         for name, cat_type in test_categories:
-            if name not in existing_categories:
-                self.db.add_category(Category(name=name, type=cat_type))
+            if name not in self._cat_ids:
+                self._cat_ids[name] = self.db.add_category(Category(name=name, type=cat_type))
         
         # 添加账户（如不存在）
-        existing_accounts = {a.name for a in self.db.get_all_accounts()}
-        if "现金" not in existing_accounts:
-            self.db.add_account(Account(name="现金", type="cash"))
-        
-        self.categories = {c.name: c for c in self.db.get_all_categories()}
-        self.accounts = {a.name: a for a in self.db.get_all_accounts()}
+        self._acc_ids: Dict[str, int] = {a.name: a.id for a in self.db.get_all_accounts()}
+        if "现金" not in self._acc_ids:
+            self._acc_ids["现金"] = self.db.add_account(Account(name="现金", type="cash"))
         
     def teardown(self):
         """清理测试环境"""
         if self.db:
             self.db.close()
-        if self.temp_dir:
-            shutil.rmtree(self.temp_dir)
             
-    def reset_db(self):
-        """重置数据库（清除所有交易）"""
-        if self.db and self.db.conn:
-            cursor = self.db.conn.cursor()
-            cursor.execute("DELETE FROM transactions")
-            self.db.conn.commit()
+    def run_isolated(self, test) -> None:
+        """在隔离作用域内执行单个测试
+        
+        退出时回滚测试期间的全部写入（SAVEPOINT），每个测试都从空交易表开始，
+        不再逐行 DELETE。
+        """
+        with self.db.rollback_scope():
+            test()
             
-    def add_expense(self, amount_cents: int, date_str: str, category: str = "餐饮") -> int:
-        """添加支出"""
-        cat = self.categories.get(category)
-        acc = self.accounts.get("现金")
-        tx = Transaction(
-            type="expense",
+    def _make_transaction(self, tx_type: str, amount_cents: int, date_str: str,
+                          category: str) -> Transaction:
+        """构造测试交易（关联分类与现金账户）"""
+        return Transaction(
+            type=tx_type,
             amount_cents=amount_cents,
             date=date_str,
             category=category,
             account="现金",
             note="测试",
-            category_id=cat.id if cat else None,
-            account_id=acc.id if acc else None
+            category_id=self._cat_ids.get(category),
+            account_id=self._acc_ids.get("现金")
+        )
+    
+    def add_transactions_bulk(self, rows) -> int:
+        """批量添加交易（一条预编译语句 + 一次提交）
+        
+        Args:
+            rows: [(type, amount_cents, date_str, category), ...]
+        """
+        return self.db.add_transactions(
+            self._make_transaction(tx_type, amount_cents, date_str, category)
+            for tx_type, amount_cents, date_str, category in rows
+        )
+            
+    def add_expense(self, amount_cents: int, date_str: str, category: str = "餐饮") -> int:
+        """添加支出"""
+        return self.db.add_transaction(
+            self._make_transaction("expense", amount_cents, date_str, category)
         )
-        return self.db.add_transaction(tx)
     
     def add_income(self, amount_cents: int, date_str: str, category: str = "工资") -> int:
         """添加收入"""
-        cat = self.categories.get(category)
-        acc = self.accounts.get("现金")
-        tx = Transaction(
-            type="income",
-            amount_cents=amount_cents,
-            date=date_str,
-            category=category,
-            account="现金",
-            note="测试",
-            category_id=cat.id if cat else None,
-            account_id=acc.id if acc else None
+        return self.db.add_transaction(
+            self._make_transaction("income", amount_cents, date_str, category)
         )
-        return self.db.add_transaction(tx)
     
     def record_result(self, test_id: str, name: str, passed: bool, 
                       details: str = "", severity: str = "Major"):
@@ -121,9 +266,9 @@ class TrendChartTestSuite:
             "severity": severity
         })
         icon = "✅" if passed else "❌"
-        print(f"  {icon} {test_id}: {name} - {status}")
+        print(f"  {icon} {test_id}: {name} - {status}", file=self.out)
         if details:
-            print(f"      {details}")
+            print(f"      {details}", file=self.out)
     
     # ==========================================================
     # 5.1 基础正确性测试
@@ -131,18 +276,18 @@ class TrendChartTestSuite:
     
     def test_trend_001_daily_expense_aggregation(self):
         """TC-TREND-001: 本月按天聚合（支出）"""
-        self.reset_db()
         today = date.today()
         
         # 在本月不同日期新增多笔支出
-        day1 = today.replace(day=1).strftime("%Y-%m-%d")
-        day5 = today.replace(day=5).strftime("%Y-%m-%d")
-        day10 = today.replace(day=10).strftime("%Y-%m-%d")
+        day1, day5, day10 = self._day_strs[0], self._day_strs[4], self._day_strs[9]
         
-        self.add_expense(1000, day1)  # $10.00
-        self.add_expense(2000, day1)  # $20.00 -> 同一天合计$30.00
-        self.add_expense(3000, day5)  # $30.00
-        self.add_expense(5000, day10) # $50.00
+        rows = [
+            ("expense", 1000, day1, "餐饮"),   # $10.00
+            ("expense", 2000, day1, "餐饮"),   # $20.00 -> 同一天合计$30.00
+            ("expense", 3000, day5, "餐饮"),   # $30.00
+            ("expense", 5000, day10, "餐饮"),  # $50.00
+        ]
+        self.add_transactions_bulk(rows)
         
         # 获取本月趋势数据
         start, end = self.stats_service.get_month_range(today.year, today.month)
@@ -155,27 +300,8 @@ class TrendChartTestSuite:
         if trend_result["granularity"] != "day":
             errors.append(f"粒度应为 day，实际为 {trend_result['granularity']}")
         
-        # 转换为字典便于查找
-        data_map = {item["label"]: item for item in trend_result["data"]}
-        
-        # 检查各日支出
-        if day1 in data_map:
-            if data_map[day1]["expense"] != 30.0:  # 1000 + 2000 = 3000 cents = $30.00
-                errors.append(f"{day1} 支出应为 30.0，实际为 {data_map[day1]['expense']}")
-        else:
-            errors.append(f"{day1} 未在趋势数据中")
-            
-        if day5 in data_map:
-            if data_map[day5]["expense"] != 30.0:
-                errors.append(f"{day5} 支出应为 30.0，实际为 {data_map[day5]['expense']}")
-        else:
-            errors.append(f"{day5} 未在趋势数据中")
-            
-        if day10 in data_map:
-            if data_map[day10]["expense"] != 50.0:
-                errors.append(f"{day10} 支出应为 50.0，实际为 {data_map[day10]['expense']}")
-        else:
-            errors.append(f"{day10} 未在趋势数据中")
+        # 逐日与本地汇总比较（同日多笔合计，无交易日应为0）
+        errors.extend(_aggregation_mismatches(trend_result, rows))
         
         # 检查X轴是否连续（检查数据点数量）
         expected_days = (date.fromisoformat(end) - date.fromisoformat(start)).days + 1
@@ -183,12 +309,6 @@ class TrendChartTestSuite:
         if actual_days != expected_days:
             errors.append(f"X轴应有 {expected_days} 天，实际有 {actual_days} 天")
         
-        # 检查无交易日期是否为0
-        day2 = today.replace(day=2).strftime("%Y-%m-%d")
-        if day2 in data_map:
-            if data_map[day2]["expense"] != 0.0:
-                errors.append(f"无交易日 {day2} 支出应为 0，实际为 {data_map[day2]['expense']}")
-        
         self.record_result(
             "TC-TREND-001", 
             "本月按天聚合（支出）",
@@ -199,40 +319,25 @@ class TrendChartTestSuite:
     
     def test_trend_002_daily_income_aggregation(self):
         """TC-TREND-002: 本月按天聚合（收入）"""
-        self.reset_db()
         today = date.today()
         
         # 在本月不同日期新增多笔收入
-        day1 = today.replace(day=1).strftime("%Y-%m-%d")
-        day5 = today.replace(day=5).strftime("%Y-%m-%d")
-        
-        self.add_income(500000, day1)  # $5000.00 工资
-        self.add_income(100000, day5)  # $1000.00 奖金
+        day1, day5 = self._day_strs[0], self._day_strs[4]
         
         # 同时添加一笔支出来检验两条线区分
-        self.add_expense(2000, day1)  # $20.00
+        rows = [
+            ("income", 500000, day1, "工资"),  # $5000.00 工资
+            ("income", 100000, day5, "工资"),  # $1000.00 奖金
+            ("expense", 2000, day1, "餐饮"),   # $20.00
+        ]
+        self.add_transactions_bulk(rows)
         
         # 获取本月趋势数据
         start, end = self.stats_service.get_month_range(today.year, today.month)
         trend_result = self.stats_service.get_trend_data(start, end)
         
-        errors = []
-        data_map = {item["label"]: item for item in trend_result["data"]}
-        
-        # 检查收入数据
-        if day1 in data_map:
-            if data_map[day1]["income"] != 5000.0:
-                errors.append(f"{day1} 收入应为 5000.0，实际为 {data_map[day1]['income']}")
-            if data_map[day1]["expense"] != 20.0:
-                errors.append(f"{day1} 支出应为 20.0，实际为 {data_map[day1]['expense']}")
-        else:
-            errors.append(f"{day1} 未在趋势数据中")
-            
-        if day5 in data_map:
-            if data_map[day5]["income"] != 1000.0:
-                errors.append(f"{day5} 收入应为 1000.0，实际为 {data_map[day5]['income']}")
-        else:
-            errors.append(f"{day5} 未在趋势数据中")
+        # 收入、支出两条线逐日与本地汇总比较
+        errors = _aggregation_mismatches(trend_result, rows)
         
         self.record_result(
             "TC-TREND-002",
@@ -248,21 +353,22 @@ class TrendChartTestSuite:
     
     def test_trend_003_yearly_monthly_aggregation(self):
         """TC-TREND-003: 本年按月聚合"""
-        self.reset_db()
         today = date.today()
         
         # 在不同月份新增支出与收入
         jan_date = f"{today.year}-01-15"
         mar_date = f"{today.year}-03-10"
         
-        # 一月份
-        self.add_expense(10000, jan_date)  # $100
-        self.add_expense(5000, jan_date)   # $50 -> 合计 $150
-        self.add_income(200000, jan_date)  # $2000
-        
-        # 三月份
-        self.add_expense(30000, mar_date)  # $300
-        self.add_income(100000, mar_date)  # $1000
+        rows = [
+            # 一月份
+            ("expense", 10000, jan_date, "餐饮"),  # $100
+            ("expense", 5000, jan_date, "餐饮"),   # $50 -> 合计 $150
+            ("income", 200000, jan_date, "工资"),  # $2000
+            # 三月份
+            ("expense", 30000, mar_date, "餐饮"),  # $300
+            ("income", 100000, mar_date, "工资"),  # $1000
+        ]
+        self.add_transactions_bulk(rows)
         
         # 获取本年趋势数据
         start, end = self.stats_service.get_year_range(today.year)
@@ -274,37 +380,8 @@ class TrendChartTestSuite:
         if trend_result["granularity"] != "month":
             errors.append(f"粒度应为 month，实际为 {trend_result['granularity']}")
         
-        data_map = {item["label"]: item for item in trend_result["data"]}
-        
-        # 检查一月份数据
-        jan_key = f"{today.year}-01"
-        if jan_key in data_map:
-            if data_map[jan_key]["expense"] != 150.0:
-                errors.append(f"1月支出应为 150.0，实际为 {data_map[jan_key]['expense']}")
-            if data_map[jan_key]["income"] != 2000.0:
-                errors.append(f"1月收入应为 2000.0，实际为 {data_map[jan_key]['income']}")
-        else:
-            errors.append(f"{jan_key} 未在趋势数据中")
-        
-        # 检查三月份数据
-        mar_key = f"{today.year}-03"
-        if mar_key in data_map:
-            if data_map[mar_key]["expense"] != 300.0:
-                errors.append(f"3月支出应为 300.0，实际为 {data_map[mar_key]['expense']}")
-            if data_map[mar_key]["income"] != 1000.0:
-                errors.append(f"3月收入应为 1000.0，实际为 {data_map[mar_key]['income']}")
-        else:
-            errors.append(f"{mar_key} 未在趋势数据中")
-        
-        # 检查二月份（无交易）应为0
-        feb_key = f"{today.year}-02"
-        if feb_key in data_map:
-            if data_map[feb_key]["expense"] != 0.0:
-                errors.append(f"2月支出应为 0，实际为 {data_map[feb_key]['expense']}")
-            if data_map[feb_key]["income"] != 0.0:
-                errors.append(f"2月收入应为 0，实际为 {data_map[feb_key]['income']}")
-        else:
-            errors.append(f"{feb_key} 未在趋势数据中（应显示为0）")
+        # 逐月与本地按 YYYY-MM 汇总比较（二月无交易应为0）
+        errors.extend(_aggregation_mismatches(trend_result, rows, lambda d: d[:7]))
         
         # 检查月份数量（1-12月）
         if len(trend_result["data"]) != 12:
@@ -320,37 +397,32 @@ class TrendChartTestSuite:
     
     def test_trend_004_granularity_auto_switch(self):
         """TC-TREND-004: 自定义区间粒度切换"""
-        self.reset_db()
         today = date.today()
         
         # 添加一些测试数据
-        self.add_expense(5000, today.strftime("%Y-%m-%d"))
+        today_str = today.isoformat()
+        self.add_expense(5000, today_str)
         
         errors = []
         
-        # 测试1: 10天区间 -> 应按天显示
-        start_10d = (today - timedelta(days=9)).strftime("%Y-%m-%d")
-        end_10d = today.strftime("%Y-%m-%d")
-        result_10d = self.stats_service.get_trend_data(start_10d, end_10d)
+        # 三个区间一次批量获取：10天、31天（临界值）、3个月
+        result_10d, result_31d, result_3m = self.stats_service.get_multi_trend_data([
+            ((today - timedelta(days=9)).isoformat(), today_str),
+            ((today - timedelta(days=30)).isoformat(), today_str),
+            ((today - timedelta(days=90)).isoformat(), today_str),
+        ])
         
+        # 测试1: 10天区间 -> 应按天显示
         if result_10d["granularity"] != "day":
             errors.append(f"10天区间粒度应为 day，实际为 {result_10d['granularity']}")
         if len(result_10d["data"]) != 10:
             errors.append(f"10天区间应有10个数据点，实际有 {len(result_10d['data'])} 个")
         
         # 测试2: 31天区间（临界值）-> 应按天显示
-        start_31d = (today - timedelta(days=30)).strftime("%Y-%m-%d")
-        end_31d = today.strftime("%Y-%m-%d")
-        result_31d = self.stats_service.get_trend_data(start_31d, end_31d)
-        
         if result_31d["granularity"] != "day":
             errors.append(f"31天区间粒度应为 day，实际为 {result_31d['granularity']}")
         
         # 测试3: 3个月区间 -> 应按月显示
-        start_3m = (today - timedelta(days=90)).strftime("%Y-%m-%d")
-        end_3m = today.strftime("%Y-%m-%d")
-        result_3m = self.stats_service.get_trend_data(start_3m, end_3m)
-        
         if result_3m["granularity"] != "month":
             errors.append(f"3个月区间粒度应为 month，实际为 {result_3m['granularity']}")
         
@@ -368,20 +440,21 @@ class TrendChartTestSuite:
     
     def test_trend_005_boundary_dates(self):
         """TC-TREND-005: 边界日期包含性"""
-        self.reset_db()
         
         # 使用固定日期范围
         start_date = "2026-01-05"
         end_date = "2026-01-15"
         
         # 在起始日和结束日各新增一笔交易
-        self.add_expense(1000, start_date)  # $10 起始日
-        self.add_expense(2000, end_date)    # $20 结束日
+        self.add_transactions_bulk([
+            ("expense", 1000, start_date, "餐饮"),  # $10 起始日
+            ("expense", 2000, end_date, "餐饮"),    # $20 结束日
+        ])
         
         trend_result = self.stats_service.get_trend_data(start_date, end_date)
         
         errors = []
-        data_map = {item["label"]: item for item in trend_result["data"]}
+        data_map = _get_points(trend_result, (start_date, end_date))
         
         # 验证起始日包含
         if start_date not in data_map:
@@ -409,32 +482,30 @@ class TrendChartTestSuite:
     
     def test_trend_006_continuity(self):
         """TC-TREND-006: 连续性测试"""
-        self.reset_db()
         
         # 使用10天区间，只在第1天和第10天有交易
         start_date = "2026-01-01"
         end_date = "2026-01-10"
         
-        self.add_expense(1000, start_date)
-        self.add_expense(2000, end_date)
+        self.add_transactions_bulk([
+            ("expense", 1000, start_date, "餐饮"),
+            ("expense", 2000, end_date, "餐饮"),
+        ])
         
         trend_result = self.stats_service.get_trend_data(start_date, end_date)
         
         errors = []
         
         # 检查连续性：所有日期都应存在
-        expected_dates = []
-        current = date.fromisoformat(start_date)
-        end = date.fromisoformat(end_date)
-        while current <= end:
-            expected_dates.append(current.strftime("%Y-%m-%d"))
-            current += timedelta(days=1)
+        start = date.fromisoformat(start_date)
+        days = (date.fromisoformat(end_date) - start).days + 1
+        expected_dates = [(start + timedelta(days=i)).isoformat() for i in range(days)]
         
         actual_labels = [item["label"] for item in trend_result["data"]]
         
         if actual_labels != expected_dates:
-            missing = set(expected_dates) - set(actual_labels)
-            extra = set(actual_labels) - set(expected_dates)
+            # 两个序列都按日期升序，归并一次即可得到差集
+            missing, extra = _sorted_diff(expected_dates, actual_labels)
             if missing:
                 errors.append(f"缺失日期: {missing}")
             if extra:
@@ -462,24 +533,23 @@ class TrendChartTestSuite:
     
     def test_trend_007_add_refresh(self):
         """TC-TREND-007: 新增交易后刷新"""
-        self.reset_db()
         today = date.today()
-        today_str = today.strftime("%Y-%m-%d")
+        today_str = today.isoformat()
         
         start, end = self.stats_service.get_month_range(today.year, today.month)
         
         # 初始状态
         result_before = self.stats_service.get_trend_data(start, end)
-        before_map = {item["label"]: item for item in result_before["data"]}
-        initial_expense = before_map.get(today_str, {}).get("expense", 0)
+        before_map = _get_points(result_before, (today_str,))
+        initial_expense = _val(before_map, today_str, "expense")
         
         # 新增一笔交易
         self.add_expense(5000, today_str)  # $50
         
         # 再次获取数据（模拟刷新）
         result_after = self.stats_service.get_trend_data(start, end)
-        after_map = {item["label"]: item for item in result_after["data"]}
-        new_expense = after_map.get(today_str, {}).get("expense", 0)
+        after_map = _get_points(result_after, (today_str,))
+        new_expense = _val(after_map, today_str, "expense")
         
         errors = []
         expected = initial_expense + 50.0
@@ -496,39 +566,35 @@ class TrendChartTestSuite:
     
     def test_trend_008_modify_refresh(self):
         """TC-TREND-008: 修改交易后刷新"""
-        self.reset_db()
         today = date.today()
-        today_str = today.strftime("%Y-%m-%d")
-        yesterday_str = (today - timedelta(days=1)).strftime("%Y-%m-%d")
+        today_str = today.isoformat()
+        yesterday_str = (today - timedelta(days=1)).isoformat()
         
         # 添加初始交易
         tx_id = self.add_expense(5000, today_str)  # $50
         
         start, end = self.stats_service.get_month_range(today.year, today.month)
         
-        # 修改金额
-        tx = self.db.get_transaction_by_id(tx_id)
-        tx.amount_cents = 10000  # 改为 $100
-        self.db.update_transaction(tx)
+        # 修改金额（只更新该列，无需先读出交易）
+        self.db.patch_transaction(tx_id, amount_cents=10000)  # 改为 $100
         
         result_after = self.stats_service.get_trend_data(start, end)
-        after_map = {item["label"]: item for item in result_after["data"]}
+        after_map = _get_points(result_after, (today_str,))
         
         errors = []
-        if after_map.get(today_str, {}).get("expense") != 100.0:
-            errors.append(f"修改金额后支出应为 100.0，实际为 {after_map.get(today_str, {}).get('expense')}")
+        if _val(after_map, today_str, "expense") != 100.0:
+            errors.append(f"修改金额后支出应为 100.0，实际为 {_val(after_map, today_str, 'expense')}")
         
         # 修改日期
-        tx.date = yesterday_str
-        self.db.update_transaction(tx)
+        self.db.patch_transaction(tx_id, date=yesterday_str)
         
         result_after2 = self.stats_service.get_trend_data(start, end)
-        after_map2 = {item["label"]: item for item in result_after2["data"]}
+        after_map2 = _get_points(result_after2, (today_str, yesterday_str))
         
-        if after_map2.get(today_str, {}).get("expense", 0) != 0.0:
-            errors.append(f"修改日期后原日期支出应为 0，实际为 {after_map2.get(today_str, {}).get('expense')}")
-        if after_map2.get(yesterday_str, {}).get("expense") != 100.0:
-            errors.append(f"修改日期后新日期支出应为 100.0，实际为 {after_map2.get(yesterday_str, {}).get('expense')}")
+        if _val(after_map2, today_str, "expense") != 0.0:
+            errors.append(f"修改日期后原日期支出应为 0，实际为 {_val(after_map2, today_str, 'expense')}")
+        if _val(after_map2, yesterday_str, "expense") != 100.0:
+            errors.append(f"修改日期后新日期支出应为 100.0，实际为 {_val(after_map2, yesterday_str, 'expense')}")
         
         self.record_result(
             "TC-TREND-008",
@@ -540,9 +606,8 @@ class TrendChartTestSuite:
     
     def test_trend_009_delete_refresh(self):
         """TC-TREND-009: 删除交易后刷新"""
-        self.reset_db()
         today = date.today()
-        today_str = today.strftime("%Y-%m-%d")
+        today_str = today.isoformat()
         
         # 添加两笔交易
         tx_id1 = self.add_expense(3000, today_str)  # $30
@@ -552,29 +617,29 @@ class TrendChartTestSuite:
         
         # 验证初始状态
         result_before = self.stats_service.get_trend_data(start, end)
-        before_map = {item["label"]: item for item in result_before["data"]}
+        before_map = _get_points(result_before, (today_str,))
         
         errors = []
-        if before_map.get(today_str, {}).get("expense") != 50.0:
+        if _val(before_map, today_str, "expense") != 50.0:
             errors.append(f"初始支出应为 50.0")
         
         # 删除一笔
         self.db.delete_transaction(tx_id1)
         
         result_after = self.stats_service.get_trend_data(start, end)
-        after_map = {item["label"]: item for item in result_after["data"]}
+        after_map = _get_points(result_after, (today_str,))
         
-        if after_map.get(today_str, {}).get("expense") != 20.0:
-            errors.append(f"删除后支出应为 20.0，实际为 {after_map.get(today_str, {}).get('expense')}")
+        if _val(after_map, today_str, "expense") != 20.0:
+            errors.append(f"删除后支出应为 20.0，实际为 {_val(after_map, today_str, 'expense')}")
         
         # 删除最后一笔
         self.db.delete_transaction(tx_id2)
         
         result_final = self.stats_service.get_trend_data(start, end)
-        final_map = {item["label"]: item for item in result_final["data"]}
+        final_map = _get_points(result_final, (today_str,))
         
-        if final_map.get(today_str, {}).get("expense") != 0.0:
-            errors.append(f"全部删除后支出应为 0，实际为 {final_map.get(today_str, {}).get('expense')}")
+        if _val(final_map, today_str, "expense") != 0.0:
+            errors.append(f"全部删除后支出应为 0，实际为 {_val(final_map, today_str, 'expense')}")
         
         self.record_result(
             "TC-TREND-009",
@@ -590,7 +655,6 @@ class TrendChartTestSuite:
     
     def test_trend_010_empty_data(self):
         """TC-TREND-010: 无收支数据"""
-        self.reset_db()
         
         # 选择一个完全无交易的区间（过去的某段时间）
         start_date = "2020-01-01"
@@ -643,19 +707,12 @@ class TrendChartTestSuite:
         if COLOR_INCOME == COLOR_EXPENSE:
             errors.append("收入和支出颜色相同，无法区分")
         
-        # 检查颜色对比度（简单检查）
-        income_color = COLOR_INCOME.lstrip('#')
-        expense_color = COLOR_EXPENSE.lstrip('#')
-        
+        # 检查颜色对比度（简单检查）：bytes.fromhex 一次解析出 RGB 三个通道
         # 绿色检查（收入）
-        income_r = int(income_color[0:2], 16)
-        income_g = int(income_color[2:4], 16)
-        income_b = int(income_color[4:6], 16)
+        income_r, income_g, income_b = bytes.fromhex(COLOR_INCOME.lstrip('#'))
         
         # 红色检查（支出）
-        expense_r = int(expense_color[0:2], 16)
-        expense_g = int(expense_color[2:4], 16)
-        expense_b = int(expense_color[4:6], 16)
+        expense_r, expense_g, expense_b = bytes.fromhex(COLOR_EXPENSE.lstrip('#'))
         
         # 检查是否足够鲜艳（至少一个通道>100）
         if max(income_r, income_g, income_b) < 100:
@@ -689,22 +746,21 @@ class TrendChartTestSuite:
     
     def test_trend_consistency_with_summary(self):
         """额外测试：趋势图与统计汇总一致性"""
-        self.reset_db()
         today = date.today()
         
-        # 添加本月交易
-        for i in range(1, 11):
-            day_str = today.replace(day=min(i, 28)).strftime("%Y-%m-%d")
-            self.add_expense(i * 1000, day_str)  # $10, $20, ..., $100
-            if i % 3 == 0:
-                self.add_income(i * 2000, day_str)
+        # 添加本月交易：先构造全部行参数，再一次批量写入
+        days = {i: self._day_strs[min(i, 28) - 1] for i in range(1, 11)}
+        self.add_transactions_bulk(
+            [("expense", i * 1000, day_str, "餐饮") for i, day_str in days.items()]  # $10, $20, ..., $100
+            + [("income", i * 2000, days[i], "工资") for i in range(3, 11, 3)]
+        )
         
         start, end = self.stats_service.get_month_range(today.year, today.month)
         
-        # 从趋势图计算总额
-        trend_result = self.stats_service.get_trend_data(start, end)
-        trend_total_expense = sum(item["expense"] for item in trend_result["data"])
-        trend_total_income = sum(item["income"] for item in trend_result["data"])
+        # 从趋势图计算总额（按列取数据，整列求和）
+        _, income_col, expense_col = self.stats_service.get_trend_arrays(start, end)
+        trend_total_expense = sum(expense_col)
+        trend_total_income = sum(income_col)
         
         # 从汇总API获取总额
         summary = self.stats_service.get_custom_period_summary(start, end)
@@ -727,116 +783,117 @@ class TrendChartTestSuite:
             "Blocker"
         )
     
-    def run_all_tests(self):
-        """运行所有测试"""
-        print("\n" + "=" * 70)
-        print("Ledger App - 收支趋势图功能测试")
-        print("Phase 1.x - Trend Chart Test Suite")
-        print(f"测试时间: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}")
-        print("=" * 70)
-        
+    # 测试分组：(标题, 测试方法名)
+    SECTIONS = (
+        ("5.1 基础正确性测试", ("test_trend_001_daily_expense_aggregation",
+                              "test_trend_002_daily_income_aggregation")),
+        ("5.2 跨区间与粒度切换", ("test_trend_003_yearly_monthly_aggregation",
+                                "test_trend_004_granularity_auto_switch")),
+        ("5.3 边界与连续性测试", ("test_trend_005_boundary_dates", "test_trend_006_continuity")),
+        ("5.4 数据变更同步测试", ("test_trend_007_add_refresh", "test_trend_008_modify_refresh",
+                                "test_trend_009_delete_refresh")),
+        ("5.5 空数据场景", ("test_trend_010_empty_data",)),
+        ("5.6 可读性与一致性检查", ("test_trend_011_012_theme_readability",
+                                  "test_trend_consistency_with_summary")),
+    )
+    
+    def run_sections(self, sections: Iterable[tuple]) -> None:
+        """在本实例的数据库上依次运行若干测试分组"""
         try:
             self.setup()
-            
-            print("\n📊 5.1 基础正确性测试")
-            print("-" * 50)
-            self.test_trend_001_daily_expense_aggregation()
-            self.test_trend_002_daily_income_aggregation()
-            
-            print("\n📊 5.2 跨区间与粒度切换")
-            print("-" * 50)
-            self.test_trend_003_yearly_monthly_aggregation()
-            self.test_trend_004_granularity_auto_switch()
-            
-            print("\n📊 5.3 边界与连续性测试")
-            print("-" * 50)
-            self.test_trend_005_boundary_dates()
-            self.test_trend_006_continuity()
-            
-            print("\n📊 5.4 数据变更同步测试")
-            print("-" * 50)
-            self.test_trend_007_add_refresh()
-            self.test_trend_008_modify_refresh()
-            self.test_trend_009_delete_refresh()
-            
-            print("\n📊 5.5 空数据场景")
-            print("-" * 50)
-            self.test_trend_010_empty_data()
-            
-            print("\n📊 5.6 可读性与一致性检查")
-            print("-" * 50)
-            self.test_trend_011_012_theme_readability()
-            self.test_trend_consistency_with_summary()
-            
+            for title, test_names in sections:
+                print(f"\n📊 {title}", file=self.out)
+                print("-" * 50, file=self.out)
+                for test_name in test_names:
+                    self.run_isolated(getattr(self, test_name))
         finally:
             self.teardown()
+    
+    def run_all_tests(self):
+        """运行所有测试
+        
+        各分组按工作线程数切成连续的批次，每个批次使用独立的内存数据库并行运行，
+        输出按分组顺序回放。
+        """
+        print("\n" + "=" * 70, file=self.out)
+        print("Ledger App - 收支趋势图功能测试", file=self.out)
+        print("Phase 1.x - Trend Chart Test Suite", file=self.out)
+        print(f"测试时间: {self.timestamp}", file=self.out)
+        print("=" * 70, file=self.out)
+        
+        # 每个线程只建一个数据库连接，批次内各测试由回滚作用域隔离
+        for worker, output in run_sections_parallel(self.SECTIONS, TrendChartTestSuite):
+            self.out.write(output)
+            self.results.extend(worker.results)
         
         return self.generate_report()
     
     def generate_report(self) -> Dict[str, Any]:
         """生成测试报告"""
         total = len(self.results)
-        passed = sum(1 for r in self.results if r["passed"])
+        passed = sum(r["passed"] for r in self.results)
         failed = total - passed
         
-        # 按严重级别统计失败
-        failures_by_severity = {}
-        for r in self.results:
-            if not r["passed"]:
-                sev = r["severity"]
-                failures_by_severity[sev] = failures_by_severity.get(sev, 0) + 1
-        
-        print("\n" + "=" * 70)
-        print("测试结果汇总")
-        print("=" * 70)
-        print(f"总测试数: {total}")
-        print(f"通过: {passed} ✅")
-        print(f"失败: {failed} ❌")
-        print(f"通过率: {passed/total*100:.1f}%")
+        # 按严重级别统计失败（按首次出现的顺序输出）
+        failures_by_severity = Counter(r["severity"] for r in self.results if not r["passed"])
+        
+        # 汇总输出先收集为行列表，最后一次 print 输出
+        lines = [
+            "\n" + "=" * 70,
+            "测试结果汇总",
+            "=" * 70,
+            f"总测试数: {total}",
+            f"通过: {passed} ✅",
+            f"失败: {failed} ❌",
+            f"通过率: {passed/total*100:.1f}%",
+        ]
         
         if failures_by_severity:
-            print("\n失败分布:")
+            lines.append("\n失败分布:")
             for sev, count in failures_by_severity.items():
-                print(f"  - {sev}: {count}")
+                lines.append(f"  - {sev}: {count}")
         
         # 输出失败详情
         if failed > 0:
-            print("\n❌ 失败用例详情:")
-            print("-" * 50)
+            lines.append("\n❌ 失败用例详情:")
+            lines.append("-" * 50)
             for r in self.results:
                 if not r["passed"]:
-                    print(f"  [{r['severity']}] {r['id']}: {r['name']}")
-                    print(f"    详情: {r['details']}")
+                    lines.append(f"  [{r['severity']}] {r['id']}: {r['name']}")
+                    lines.append(f"    详情: {r['details']}")
         
         # QA结论
-        print("\n" + "=" * 70)
-        print("QA 结论")
-        print("=" * 70)
+        lines.append("\n" + "=" * 70)
+        lines.append("QA 结论")
+        lines.append("=" * 70)
         
         blockers = failures_by_severity.get("Blocker", 0)
         criticals = failures_by_severity.get("Critical", 0)
         
         if blockers > 0:
-            print("🚫 存在 Blocker 级别缺陷，趋势图功能不可用")
-            print("   建议: 修复后重新测试")
+            lines.append("🚫 存在 Blocker 级别缺陷，趋势图功能不可用")
+            lines.append("   建议: 修复后重新测试")
             qa_conclusion = "BLOCKED"
         elif criticals > 0:
-            print("⚠️ 存在 Critical 级别缺陷，趋势图功能部分受影响")
-            print("   建议: 评估风险后决定是否发布")
+            lines.append("⚠️ 存在 Critical 级别缺陷，趋势图功能部分受影响")
+            lines.append("   建议: 评估风险后决定是否发布")
             qa_conclusion = "CONDITIONAL"
         elif failed > 0:
-            print("⚠️ 存在 Major/Minor 级别缺陷")
-            print("   建议: 可进入下一阶段，但应计划修复")
+            lines.append("⚠️ 存在 Major/Minor 级别缺陷")
+            lines.append("   建议: 可进入下一阶段，但应计划修复")
             qa_conclusion = "PASS_WITH_ISSUES"
         else:
-            print("✅ 所有测试通过")
-            print("   趋势图功能：可信、连续、可读")
-            print("   建议: 可进入下一阶段")
+            lines.append("✅ 所有测试通过")
+            lines.append("   趋势图功能：可信、连续、可读")
+            lines.append("   建议: 可进入下一阶段")
             qa_conclusion = "PASS"
         
-        print("\n注意事项:")
-        print("  - TC-TREND-011/012 深色/浅色模式可读性需手动验证")
-        print("  - 建议在实际应用中切换系统主题进行视觉检查")
+        lines += [
+            "\n注意事项:",
+            "  - TC-TREND-011/012 深色/浅色模式可读性需手动验证",
+            "  - 建议在实际应用中切换系统主题进行视觉检查",
+        ]
+        print(*lines, sep="\n", file=self.out)
         
         return {
             "total": total,
@@ -848,73 +905,59 @@ class TrendChartTestSuite:
         }
 
 
+def _render_report(report: Dict[str, Any], timestamp: str) -> bytes:
+    """将测试报告渲染为 UTF-8 编码的 Markdown
+    
+    直接在 bytearray 中拼接：固定段落在导入时已编码，只对动态内容编码一次，
+    不再先拼出完整字符串再整体编码。
+    """
+    buf = bytearray(_REPORT_HEADER_TMPL.format(
+        timestamp=timestamp,
+        total=report["total"],
+        passed=report["passed"],
+        failed=report["failed"],
+        pass_rate=report["pass_rate"],
+        qa_conclusion=report["qa_conclusion"],
+    ).encode("utf-8"))
+    # 一次遍历结果：写入用例表行，同时收集失败用例的待修复条目
+    fail_lines = []
+    for test_id, name, passed, severity, details in map(_row_fields, report["results"]):
+        buf += _ROW_TMPL % (
+            test_id.encode("utf-8"), name.encode("utf-8"), _STATUS[passed], severity.encode("utf-8"),
+            (details[:_DETAILS_WIDTH] + "..." if len(details) > _DETAILS_WIDTH else details).encode("utf-8"),
+        )
+        if not passed:
+            fail_lines.append(f"- **{test_id}** [{severity}]: {details}\n")
+    
+    buf += _QA_HEADER
+    if report["qa_conclusion"] == "PASS":
+        buf += _QA_ALL_PASSED
+    else:
+        buf += _QA_HAS_ISSUES
+        buf += "".join(fail_lines).encode("utf-8")
+    
+    buf += _MANUAL_SECTION
+    buf += f"*报告生成时间: {timestamp}*\n".encode("utf-8")
+    return bytes(buf)
+
+
 def main():
-    suite = TrendChartTestSuite()
+    # 测试时间只取一次，传给测试套件并用于报告头尾
+    timestamp = datetime.now().strftime(TIMESTAMP_FORMAT)
+    suite = TrendChartTestSuite(timestamp=timestamp)
     report = suite.run_all_tests()
+    exit_code = 0 if report["qa_conclusion"] in _PASS_CONCLUSIONS else 1
     
-    # 保存测试报告
-    report_path = os.path.join(
-        os.path.dirname(os.path.abspath(__file__)),
-        "TEST_REPORT_TREND_CHART.md"
-    )
+    # 只关心退出码时（LEDGER_WRITE_REPORT=0）直接返回，不渲染报告
+    if not WRITE_REPORT:
+        return exit_code
     
-    with open(report_path, "w", encoding="utf-8") as f:
-        f.write("# Ledger App - 收支趋势图功能测试报告\n\n")
-        f.write(f"**测试时间**: {datetime.now().strftime('%Y-%m-%d %H:%M:%S')}\n\n")
-        f.write(f"**测试版本**: Phase 1.x\n\n")
-        f.write("---\n\n")
-        f.write("## 测试结果汇总\n\n")
-        f.write(f"| 指标 | 结果 |\n")
-        f.write(f"|------|------|\n")
-        f.write(f"| 总测试数 | {report['total']} |\n")
-        f.write(f"| 通过 | {report['passed']} ✅ |\n")
-        f.write(f"| 失败 | {report['failed']} ❌ |\n")
-        f.write(f"| 通过率 | {report['pass_rate']:.1f}% |\n")
-        f.write(f"| QA结论 | **{report['qa_conclusion']}** |\n")
-        f.write("\n---\n\n")
-        f.write("## 测试用例详情\n\n")
-        f.write("| ID | 测试项 | 状态 | 严重级别 | 详情 |\n")
-        f.write("|-----|--------|------|----------|------|\n")
-        for r in report["results"]:
-            status = "✅ PASS" if r["passed"] else "❌ FAIL"
-            details = r["details"][:80] + "..." if len(r["details"]) > 80 else r["details"]
-            f.write(f"| {r['id']} | {r['name']} | {status} | {r['severity']} | {details} |\n")
-        
-        f.write("\n---\n\n")
-        f.write("## QA 建议\n\n")
-        
-        if report["qa_conclusion"] == "PASS":
-            f.write("✅ **趋势图功能测试全部通过**\n\n")
-            f.write("功能表现：\n")
-            f.write("- 数据聚合：按天/按月聚合正确\n")
-            f.write("- 时间连续性：无断点，无交易日期显示为0\n")
-            f.write("- 粒度切换：≤31天按天，>31天按月，自动切换\n")
-            f.write("- 数据同步：新增/修改/删除后正确刷新\n")
-            f.write("- 与统计页一致性：趋势图总额与汇总一致\n\n")
-            f.write("**建议**: 可进入下一阶段开发\n")
-        else:
-            f.write("⚠️ **存在待修复问题**\n\n")
-            for r in report["results"]:
-                if not r["passed"]:
-                    f.write(f"- **{r['id']}** [{r['severity']}]: {r['details']}\n")
-        
-        f.write("\n---\n\n")
-        f.write("## 手动验证项\n\n")
-        f.write("以下测试项需要手动验证：\n\n")
-        f.write("### TC-TREND-011: 浅色模式可读性\n")
-        f.write("- [ ] 折线、坐标轴、文字清晰\n")
-        f.write("- [ ] 无颜色冲突\n")
-        f.write("- [ ] 收入线（绿）与支出线（红）区分明显\n\n")
-        f.write("### TC-TREND-012: 深色模式可读性\n")
-        f.write("- [ ] 折线与背景对比明显\n")
-        f.write("- [ ] 坐标刻度、图例、标题可读\n")
-        f.write("- [ ] 不出现黑线黑底或白线白底\n\n")
-        f.write("---\n\n")
-        f.write("*报告生成时间: " + datetime.now().strftime('%Y-%m-%d %H:%M:%S') + "*\n")
-    
-    print(f"\n📄 测试报告已保存至: {report_path}")
-    
-    return 0 if report["qa_conclusion"] in ["PASS", "PASS_WITH_ISSUES"] else 1
+    # 已编码的报告直接写入文件描述符，不经过 Python 的文本层与缓冲层
+    write_bytes(REPORT_PATH, _render_report(report, timestamp))
+    
+    print(f"\n📄 测试报告已保存至: {REPORT_PATH}")
+    
+    return exit_code
 
 
 if __name__ == "__main__":